@@ -0,0 +1,187 @@
+"""
+This Source Code Form is subject to the terms of the Mozilla Public
+License, v. 2.0. If a copy of the MPL was not distributed with this
+file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from zibot.core import data
+from zibot.core.data import (
+    Blacklist,
+    Cache,
+    CacheListProperty,
+    CacheProperty,
+    CacheSetProperty,
+    CacheUniqueViolation,
+    ExpiringDict,
+)
+
+
+def testBlacklistChangeLog(tmp_path):
+    """Test blacklist changes being logged and replayed"""
+    filename = tmp_path / "blacklist.json"
+    blacklist = Blacklist(str(filename))
+    blacklist.append("users", 1)
+    blacklist.append("users", 2)
+    blacklist.remove("users", 1)
+    assert blacklist.users == {2}
+    # Changes only goes to the change log
+    assert json.loads(filename.read_text()) == {}
+
+    blacklist = Blacklist(str(filename))
+    assert blacklist.users == {2}
+    assert not blacklist.logFilename.exists()
+    assert json.loads(filename.read_text()) == {"guilds": [], "users": [2]}
+
+
+def testBlacklistCompact(tmp_path):
+    """Test blacklist change log being compacted"""
+    filename = tmp_path / "blacklist.json"
+    blacklist = Blacklist(str(filename), compactAfter=2)
+    blacklist.append("guilds", 1)
+    assert blacklist.logFilename.exists()
+    blacklist.append("guilds", 2)
+    assert not blacklist.logFilename.exists()
+    assert json.loads(filename.read_text())["guilds"] == [1, 2]
+
+
+def testExpiringDictExpiry(monkeypatch):
+    """Test expired items being removed"""
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(data, "time", SimpleNamespace(monotonic=lambda: clock.now))
+
+    cache = ExpiringDict(maxAgeSeconds=10)
+    cache["a"] = 1
+    clock.now = 5
+    cache["b"] = 2
+    cache["a"] = 3  # Overwrite should reset the age
+    clock.now = 11
+    assert cache["a"] == 3
+    assert "b" in cache
+    clock.now = 16
+    assert "a" not in cache
+    assert "b" not in cache
+    assert cache.stats["expired"] == 2
+
+
+def testExpiringDictLRU():
+    """Test least recently used item being evicted"""
+    cache = ExpiringDict(maxSize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache["a"] == 1
+    cache["c"] = 3
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache["a"] == 1 and cache["c"] == 3
+    assert cache.stats["evictions"] == 1
+    assert cache.stats["misses"] == 1
+    assert cache.stats["hits"] == 3
+
+
+def testCachePropertyTTL(monkeypatch):
+    """Test cache property with ttl being evicted and expired"""
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(data, "time", SimpleNamespace(monotonic=lambda: clock.now))
+
+    cache = CacheProperty(ttl=10, maxEntries=2, maxBytes=10_000)
+    cache.set(1, "a").set(2, "b").set(3, "c")
+    assert 1 not in cache
+    assert cache.items == {2: "b", 3: "c"}
+    assert cache.stats()["evictions"] == 1
+    assert "CacheProperty" in repr(cache)
+
+    clock.now = 11
+    assert cache.items == {}
+    assert cache.stats()["bytes"] == 0
+
+
+@pytest.mark.asyncio
+async def testCachePropertyEviction():
+    """Test least recently used item being evicted and reloaded on miss"""
+    loaded = []
+
+    async def loader(key):
+        loaded.append(key)
+        return [key]
+
+    cache = Cache().add("test", cls=CacheListProperty, maxEntries=2, loader=loader)
+    assert await cache.test.fetch(1) == (1,)
+    assert await cache.test.fetch(2) == (2,)
+    assert await cache.test.fetch(1) == (1,)
+    assert await cache.test.fetch(3) == (3,)
+    assert cache.test.get(2) is None
+    assert await cache.test.fetch(2) == (2,)
+    assert loaded == [1, 2, 3, 2]
+
+    stats = cache.stats()["test"]
+    assert stats["size"] == 2
+    assert stats["evictions"] == 2
+    assert stats["hits"] == 1
+
+
+def testCacheListPropertyImmutable():
+    """Test list cache stores tuple keyed by int"""
+    cache = Cache().add("test", cls=CacheListProperty, unique=True)
+    cache.test.add(1, ">").add(1, "!")
+    value = cache.test[1]
+    cache.test.remove(1, ">")
+    assert value == (">", "!")
+    assert cache.test[1] == ("!",)
+    assert cache.test.get("1") is None
+
+
+@pytest.mark.asyncio
+async def testCachePropertySingleFlight():
+    """Test concurrent misses sharing a single load"""
+    loaded = []
+
+    async def loader(key):
+        loaded.append(key)
+        await asyncio.sleep(0.1)
+        return [key]
+
+    cache = Cache().add("test", cls=CacheListProperty, loader=loader)
+    results = await asyncio.gather(*[cache.test.fetch(1) for _ in range(10)])
+    assert all(r == (1,) for r in results)
+    assert loaded == [1]
+
+
+@pytest.mark.asyncio
+async def testCachePropertyClearWhileLoading():
+    """Test outdated load not being cached when the item is cleared while loading"""
+    rows = {1: ["old"]}
+
+    async def loader(key):
+        value = list(rows[key])
+        await asyncio.sleep(0.1)
+        return value
+
+    cache = Cache().add("test", cls=CacheListProperty, loader=loader)
+    pending = asyncio.ensure_future(cache.test.fetch(1))
+    await asyncio.sleep(0.01)
+
+    # Database is modified, then cache is invalidated
+    rows[1] = ["new"]
+    cache.test.clear(1)
+
+    assert await pending == ("new",)
+    assert cache.test[1] == ("new",)
+    assert not cache.test._loading and not cache.test._generations
+
+
+def testCacheSetProperty():
+    """Test set cache being unique and stored as frozenset"""
+    cache = Cache().add("test", cls=CacheSetProperty)
+    cache.test.extend(1, ["ping", "help"])
+    with pytest.raises(CacheUniqueViolation):
+        cache.test.add(1, "ping")
+    cache.test.remove(1, "help")
+    assert cache.test[1] == frozenset({"ping"})
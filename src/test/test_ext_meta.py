@@ -71,6 +71,16 @@ async def testPrefixRemove(bot: ziBot):
     assert str(dpytest.get_embed(peek=True).title).endswith("removed!")
 
 
+@pytest.mark.asyncio
+async def testPrefixRemoveUnusable(bot: ziBot):
+    """Test removed prefix can no longer be used"""
+    await dpytest.message(">prefix + !")
+    await dpytest.message(">prefix - !")
+    await dpytest.empty_queue()
+    await dpytest.message("!ping")
+    assert dpytest.verify().message().nothing()
+
+
 @pytest.mark.asyncio
 async def testPrefixNotExists(bot: ziBot):
     """Test failed prefix removal (prefix not exists)"""
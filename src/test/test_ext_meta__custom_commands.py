@@ -6,10 +6,16 @@ file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from __future__ import annotations
 
+import asyncio
+
 import discord.ext.test as dpytest
 import pytest
+from discord.ext import commands
+from tortoise.queryset import QuerySet
 
+from zibot.core import db
 from zibot.core.bot import ziBot
+from zibot.exts.meta._custom_command import PROGRAMS
 from zibot.exts.meta._errors import CCommandAlreadyExists, CCommandNotFound
 
 
@@ -43,6 +49,28 @@ async def testCommandRemoveNotExists(bot: ziBot):
         await dpytest.message(">cmd - test")
 
 
+@pytest.mark.asyncio
+async def testCommandEnableEvicted(bot: ziBot, monkeypatch):
+    """Test enabling built-in command of guild that's evicted from cache"""
+    guildId = dpytest.get_config().guilds[0].id
+    await dpytest.message(">cmd disable ping")
+    await dpytest.empty_queue()
+    assert await db.Disabled.filter(guild_id=guildId).values_list("command", flat=True) == ["ping"]
+
+    cog = bot.get_cog("Meta")
+    helper = type(cog).disableEnableHelper
+
+    async def evictingHelper(self, ctx, *args, **kwargs):
+        # Evicted while the command is being resolved
+        bot.cache.disabled.clear(guildId)  # type: ignore
+        return await helper(self, ctx, *args, **kwargs)
+
+    monkeypatch.setattr(type(cog), "disableEnableHelper", evictingHelper)
+    await dpytest.message(">cmd enable ping")
+    assert dpytest.get_embed().title.endswith("`ping` has been enabled")
+    assert not await db.Disabled.filter(guild_id=guildId).exists()
+
+
 @pytest.mark.asyncio
 async def testCommandPriorityExecution(bot: ziBot):
     """Test custom command execution priority"""
@@ -57,3 +85,167 @@ async def testCommandPriorityExecution(bot: ziBot):
 
     await dpytest.message(">ping")
     assert dpytest.get_message(peek=True).content != msg
+
+
+@pytest.mark.asyncio
+async def testCommandUnixStyleExecution(bot: ziBot):
+    """Test custom command execution with unix-style priority marker"""
+    msg = "Test"
+    await dpytest.message(f">cmd + ping {msg}")
+
+    await dpytest.message(">./ping")
+    assert dpytest.get_message(peek=True).content == msg
+
+
+@pytest.mark.asyncio
+async def testCommandArguments(bot: ziBot):
+    """Test custom command receiving arguments"""
+    await dpytest.message(">cmd + echo {args}")
+
+    await dpytest.message(">echo hello world")
+    assert dpytest.get_message(peek=True).content == "hello world"
+
+
+@pytest.mark.asyncio
+async def testCommandUsesBatched(bot: ziBot):
+    """Test custom command uses being counted then written in batch"""
+    await dpytest.message(">cmd + test {uses}")
+    await dpytest.empty_queue()
+    for i in range(3):
+        await dpytest.message(">>test")
+        assert dpytest.get_message().content == str(i + 1)
+
+    assert await db.Commands.filter(name="test").values_list("uses", flat=True) == [0]
+    await bot.ccUsage.flush()
+    assert await db.Commands.filter(name="test").values_list("uses", flat=True) == [3]
+
+
+@pytest.mark.asyncio
+async def testCommandUsesRetried(bot: ziBot, monkeypatch):
+    """Test failed uses flush being rescheduled, and close waiting for in-flight flush"""
+    await dpytest.message(">cmd + test foo")
+    await dpytest.empty_queue()
+    commandId = (await db.Commands.get(name="test")).id
+
+    realFilter = db.Commands.filter
+    calls = []
+
+    def flakyFilter(*args, **kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return realFilter(*args, **kwargs)
+
+    monkeypatch.setattr(db.Commands, "filter", flakyFilter)
+    bot.ccUsage.add(commandId, 2)
+    # Flush right away instead
+    bot.ccUsage._flushTask.cancel()
+    await bot.ccUsage._delayedFlush(0)
+    assert len(calls) == 1 and bot.ccUsage.pending(commandId) == 2
+    assert not bot.ccUsage._flushTask.done()
+
+    update = QuerySet.update
+
+    async def slowUpdate(self, **kwargs):
+        result = await update(self, **kwargs)
+        # Written, but not returned yet
+        await asyncio.sleep(0.1)
+        return result
+
+    # Close while the retry is writing
+    monkeypatch.setattr(QuerySet, "update", slowUpdate)
+    bot.ccUsage._flushTask.cancel()
+    bot.ccUsage._flushTask = asyncio.create_task(bot.ccUsage._delayedFlush(0))
+    await asyncio.sleep(0.01)
+    assert bot.ccUsage._flushing
+    await bot.ccUsage.close()
+    monkeypatch.undo()
+
+    assert await db.Commands.filter(id=commandId).values_list("uses", flat=True) == [2]
+
+
+@pytest.mark.asyncio
+async def testCommandRegistry(bot: ziBot):
+    """Test custom command lookups are served from cache and invalidated on changes"""
+    await dpytest.message(">cmd + test foo")
+    await dpytest.message(">cmd alias test bar")
+    await dpytest.empty_queue()
+
+    cache = bot.cache.customCommands  # type: ignore
+    misses = cache.misses
+    await dpytest.message(">>bar")
+    assert dpytest.get_message().content == "foo"
+    with pytest.raises(commands.CommandNotFound):
+        await dpytest.message(">>nope")
+    # Registry is loaded once, both hit and miss are served by it
+    assert cache.misses == misses + 1
+
+    await dpytest.message(">cmd edit test baz")
+    await dpytest.empty_queue()
+    await dpytest.message(">>bar")
+    assert dpytest.get_message().content == "baz"
+
+    await dpytest.message(">cmd - bar")
+    await dpytest.empty_queue()
+    registry = await cache.fetch(dpytest.get_config().guilds[0].id)
+    assert "bar" not in registry and registry["test"].aliases == []
+
+
+@pytest.mark.asyncio
+async def testCommandMissRejected(bot: ziBot):
+    """Test unknown custom commands are rejected without loading the registry"""
+    guildId = dpytest.get_config().guilds[0].id
+
+    with pytest.raises(commands.CommandNotFound):
+        await dpytest.message(">>nope")
+    assert guildId in bot.cache.customCommandNames  # type: ignore
+    assert guildId not in bot.cache.customCommands  # type: ignore
+
+    # Names are updated in place, not reloaded
+    await dpytest.message(">cmd + nope yes")
+    await dpytest.message(">cmd alias nope maybe")
+    assert bot.cache.customCommandNames.get(guildId) == {"nope", "maybe"}  # type: ignore
+    await dpytest.message(">cmd - nope")
+    assert bot.cache.customCommandNames.get(guildId) == frozenset()  # type: ignore
+
+
+@pytest.mark.asyncio
+async def testCommandNamesLoadOutdated(bot: ziBot):
+    """Test names loaded before a command is created not being cached"""
+    guildId = dpytest.get_config().guilds[0].id
+    names = bot.cache.customCommandNames  # type: ignore
+    loader = names.loader
+
+    async def slowLoader(guildId):
+        value = await loader(guildId)
+        await asyncio.sleep(0.1)
+        return value
+
+    names.loader = slowLoader
+    pending = asyncio.ensure_future(names.fetch(guildId))
+    await asyncio.sleep(0.01)
+
+    await dpytest.message(">cmd + late yes")
+    await dpytest.empty_queue()
+    assert "late" in await pending
+    await dpytest.message(">>late")
+    assert dpytest.get_message().content == "yes"
+
+
+@pytest.mark.asyncio
+async def testCommandCompiled(bot: ziBot):
+    """Test custom command is compiled once and recompiled when edited"""
+    await dpytest.message(">cmd + test {=(a):foo}{a}")
+    await dpytest.empty_queue()
+
+    size = len(PROGRAMS)
+    for _ in range(2):
+        await dpytest.message(">>test")
+        assert dpytest.get_message().content == "foo"
+    assert len(PROGRAMS) == size + 1
+
+    await dpytest.message(">cmd edit test {=(a):bar}{a}")
+    await dpytest.empty_queue()
+    await dpytest.message(">>test")
+    assert dpytest.get_message().content == "bar"
+    assert len(PROGRAMS) == size + 2
@@ -0,0 +1,104 @@
+"""
+This Source Code Form is subject to the terms of the Mozilla Public
+License, v. 2.0. If a copy of the MPL was not distributed with this
+file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+
+from __future__ import annotations
+
+import pytest
+from tortoise import Tortoise, connections
+
+from zibot.__main__ import _datamigration
+from zibot.core import db
+from zibot.core.config import Config
+from zibot.core.data import JSON
+
+
+async def _counts(url: str) -> tuple[int, int]:
+    await Tortoise.init(db_url=url, modules={"models": ["zibot.core.db"]})
+    try:
+        return await db.Guilds.all().count(), await db.Prefixes.all().count()
+    finally:
+        await connections.close_all()
+
+
+@pytest.mark.asyncio
+async def testDataMigrationResume(tmp_path, monkeypatch):
+    """Test data migration being chunked and resumed without duplicates"""
+    monkeypatch.chdir(tmp_path)
+    sourceUrl = f"sqlite://{tmp_path}/source.db"
+    destUrl = f"sqlite://{tmp_path}/dest.db"
+
+    await Tortoise.init(db_url=sourceUrl, modules={"models": ["zibot.core.db"]})
+    await Tortoise.generate_schemas()
+    await db.Guilds.bulk_create([db.Guilds(id=i) for i in range(1, 6)])
+    await db.Prefixes.bulk_create([db.Prefixes(guild_id=i % 5 + 1, prefix=str(i)) for i in range(7)])
+    await connections.close_all()
+
+    config = Config("", databaseUrl=sourceUrl, destUrl=destUrl, isDataMigration=True)
+
+    # Interrupted after the second chunk of prefixes is copied, but before
+    # its progress is saved
+    dump = JSON.dump
+    calls = []
+
+    def interruptedDump(self, *args, **kwargs):
+        calls.append(1)
+        if len(calls) == 6:
+            raise RuntimeError("Interrupted")
+        return dump(self, *args, **kwargs)
+
+    monkeypatch.setattr(JSON, "dump", interruptedDump)
+    with pytest.raises(RuntimeError):
+        await _datamigration(config, batchSize=2)
+    await connections.close_all()
+    monkeypatch.setattr(JSON, "dump", dump)
+
+    assert await _counts(destUrl) == (5, 4)
+    checkpoint = JSON("data/datamigration.json")
+    assert [progress["Prefixes"] for progress in checkpoint.values()] == [2]
+
+    await _datamigration(config, batchSize=2)
+    assert await _counts(destUrl) == (5, 7)
+    # Finished migration doesn't leave progress behind
+    assert not (tmp_path / "data" / "datamigration.json").exists()
+
+
+@pytest.mark.asyncio
+async def testDataMigrationDuplicateConfigs(tmp_path, monkeypatch):
+    """Test duplicate guild config rows being merged instead of dropped"""
+    monkeypatch.chdir(tmp_path)
+    sourceUrl = f"sqlite://{tmp_path}/source.db"
+    destUrl = f"sqlite://{tmp_path}/dest.db"
+
+    await Tortoise.init(db_url=sourceUrl, modules={"models": ["zibot.core.db"]})
+    await Tortoise.generate_schemas()
+    # Legacy table, without unique constraint on guild_id
+    await connections.get("default").execute_script(
+        """
+        DROP TABLE "guildConfigs";
+        CREATE TABLE "guildConfigs" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            "ccMode" INT NOT NULL  DEFAULT 0,
+            "tagMode" INT NOT NULL  DEFAULT 0,
+            "welcomeMsg" TEXT,
+            "farewellMsg" TEXT,
+            "locale" TEXT,
+            "guild_id" BIGINT NOT NULL REFERENCES "guilds" ("id") ON DELETE CASCADE
+        );
+        """
+    )
+    await db.Guilds.create(id=1)
+    await db.GuildConfigs.create(guild_id=1, ccMode=2)
+    await db.GuildConfigs.create(guild_id=1, welcomeMsg="Hello")
+    await connections.close_all()
+
+    await _datamigration(Config("", databaseUrl=sourceUrl, destUrl=destUrl, isDataMigration=True))
+
+    await Tortoise.init(db_url=destUrl, modules={"models": ["zibot.core.db"]})
+    try:
+        rows = await db.GuildConfigs.all().values("guild_id", "ccMode", "welcomeMsg")
+    finally:
+        await connections.close_all()
+    assert rows == [{"guild_id": 1, "ccMode": 2, "welcomeMsg": "Hello"}]
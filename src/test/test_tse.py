@@ -0,0 +1,101 @@
+"""
+This Source Code Form is subject to the terms of the Mozilla Public
+License, v. 2.0. If a copy of the MPL was not distributed with this
+file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+import tse
+
+
+@pytest.fixture
+def engine() -> tse.Interpreter:
+    return tse.Interpreter([tse.StopBlock(), tse.AssignmentBlock(), tse.StrictVariableGetterBlock()])
+
+
+def testProgramCache(engine: tse.Interpreter):
+    """Test programs being reused, recompiled when edited and evicted when full"""
+    programs = tse.ProgramCache(engine, maxsize=2)
+
+    program = programs.get(1, "{=(a):foo}{a}")
+    assert programs.get(1, "{=(a):foo}{a}") is program
+    assert engine.run(program).body == "foo"
+
+    edited = programs.get(1, "{=(a):bar}{a}")
+    assert edited is not program
+    assert engine.run(edited).body == "bar"
+
+    # Least recently used is evicted
+    assert programs.get(1, "{=(a):foo}{a}") is program
+    programs.get(2, "{=(a):baz}{a}")
+    assert len(programs) == 2
+    assert programs.get(1, "{=(a):foo}{a}") is program
+    assert programs.get(1, "{=(a):bar}{a}") is not edited
+
+
+def testWorkloadExceeded(engine: tse.Interpreter):
+    """Test compiled program respecting charlimit"""
+    program = engine.compile("{=(a):hello}{a}{a}{a}")
+
+    assert engine.run(program, charlimit=15).body == "hellohellohello"
+    with pytest.raises(tse.WorkloadExceededError):
+        engine.run(program, charlimit=14)
+    with pytest.raises(tse.WorkloadExceededError):
+        engine.process("{=(a):hello}{a}{a}{a}", charlimit=14)
+
+
+def testStop(engine: tse.Interpreter):
+    """Test blocks after stop block not being processed"""
+    response = engine.run(engine.compile("{=(x):1}before {stop(a==a):halted} after {=(y):2}{x}"))
+    assert response.body == "before halted"
+    assert response.actions == {"TSE_STOP": True}
+    assert list(response.variables) == ["x"]
+
+    response = engine.run(engine.compile("{=(x):1}before {stop(a==b):halted} after {x}"))
+    assert response.body == "before  after 1"
+    assert response.actions == {}
+
+    # Stopped while solving nested block, outer block is left as is
+    response = engine.run(engine.compile("{=(x):{stop(a==a):inner}} after"))
+    assert response.body == "{=(x):inner"
+
+
+class FirstBlock(tse.Block):
+    ACCEPTED_NAMES = ("dup",)
+
+    def process(self, ctx):
+        # Pass it to the next block if there's no parameter
+        return None if ctx.verb.parameter is None else "first"
+
+
+class SecondBlock(tse.Block):
+    ACCEPTED_NAMES = ("dup", "other")
+
+    def process(self, ctx):
+        return "second"
+
+
+class CatchAllBlock(tse.Block):
+    def will_accept(self, ctx):
+        return ctx.verb.declaration == "dup"
+
+    def process(self, ctx):
+        return None if ctx.verb.payload is None else "catch"
+
+
+def testDispatchOrder():
+    """Test blocks accepting the same declaration being processed in the given order"""
+    engine = tse.Interpreter([FirstBlock(), SecondBlock()])
+    assert engine.process("{dup(x)} {dup} {other(x)}").body == "first second second"
+    # Declaration is case-insensitive
+    assert engine.process("{DUP(x)} {Other}").body == "first second"
+    assert engine.process("{nope}").body == "{nope}"
+
+    # Blocks without ACCEPTED_NAMES keep their priority
+    engine = tse.Interpreter([CatchAllBlock(), FirstBlock(), SecondBlock()])
+    assert engine.process("{dup(x):y} {dup(x)} {DUP:y}").body == "catch first second"
+    engine = tse.Interpreter([FirstBlock(), CatchAllBlock()])
+    assert engine.process("{dup(x):y} {dup:y} {dup}").body == "first catch {dup}"
@@ -50,9 +50,7 @@ class CommandBlock(Block):
         # invokes ban command on the pinged user with the reason as "Chatflood/spam"
     """
 
-    def will_accept(self, ctx: Context) -> bool:
-        dec = ctx.verb.declaration.lower()
-        return any([dec == "c", dec == "com", dec == "command"])
+    ACCEPTED_NAMES = ("c", "com", "command")
 
     def process(self, ctx: Context) -> Optional[str]:
         if not ctx.verb.payload:
@@ -99,9 +97,7 @@ class OverrideBlock(Block):
         # overrides commands that require the mod role or have user permission requirements
     """
 
-    def will_accept(self, ctx: Context) -> bool:
-        dec = ctx.verb.declaration.lower()
-        return dec == "override"
+    ACCEPTED_NAMES = ("override",)
 
     def process(self, ctx: Context) -> Optional[str]:
         param = ctx.verb.parameter
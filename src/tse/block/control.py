@@ -50,9 +50,7 @@ class AnyBlock(Block):
         How rude.
     """
 
-    def will_accept(self, ctx: Context) -> bool:
-        dec = ctx.verb.declaration.lower()
-        return any([dec == "any", dec == "or"])
+    ACCEPTED_NAMES = ("any", "or")
 
     def process(self, ctx: Context) -> Optional[str]:
         if ctx.verb.payload is None or ctx.verb.parameter is None:
@@ -87,9 +85,7 @@ class AllBlock(Block):
         You picked 282.
     """
 
-    def will_accept(self, ctx: Context) -> bool:
-        dec = ctx.verb.declaration.lower()
-        return dec in ("all", "and")
+    ACCEPTED_NAMES = ("all", "and")
 
     def process(self, ctx: Context) -> Optional[str]:
         if ctx.verb.payload is None or ctx.verb.parameter is None:
@@ -143,9 +139,7 @@ class IfBlock(Block):
         # Too high, try again.
     """
 
-    def will_accept(self, ctx: Context) -> bool:
-        dec = ctx.verb.declaration.lower()
-        return dec == "if"
+    ACCEPTED_NAMES = ("if",)
 
     def process(self, ctx: Context) -> Optional[str]:
         if ctx.verb.payload is None or ctx.verb.parameter is None:
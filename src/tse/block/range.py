@@ -32,9 +32,7 @@ class RangeBlock(Block):
         # I am guessing your height is 5.3ft.
     """
 
-    def will_accept(self, ctx: Context) -> bool:
-        dec = ctx.verb.declaration.lower()
-        return any([dec == "rangef", dec == "range"])
+    ACCEPTED_NAMES = ("rangef", "range")
 
     def process(self, ctx: Context) -> Optional[str]:
         try:
@@ -10,10 +10,7 @@ class ReactBlockBase(Block):
     def __init__(self, type: str):
         super().__init__()
         self.type = type
-
-    def will_accept(self, ctx: Context):
-        dec = ctx.verb.declaration.lower()
-        return dec == self.type
+        self.ACCEPTED_NAMES = (type,)
 
     def process(self, ctx: Context):
         if not ctx.verb.payload:
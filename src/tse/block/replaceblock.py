@@ -29,9 +29,7 @@ class ReplaceBlock(Block):
         # T e s t
     """
 
-    def will_accept(self, ctx: Context):
-        dec = ctx.verb.declaration.lower()
-        return dec == "replace"
+    ACCEPTED_NAMES = ("replace",)
 
     def process(self, ctx: Context):
         if not (ctx.verb.parameter and ctx.verb.payload):
@@ -85,9 +83,7 @@ class PythonBlock(Block):
         # -1
     """
 
-    def will_accept(self, ctx: Context):
-        dec = ctx.verb.declaration.lower()
-        return dec in ("contains", "in", "index")
+    ACCEPTED_NAMES = ("contains", "in", "index")
 
     def process(self, ctx: Context):
         dec = ctx.verb.declaration.lower()
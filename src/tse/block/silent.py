@@ -8,9 +8,7 @@ class SilentBlock(Block):
     Don't send command block's output
     """
 
-    def will_accept(self, ctx: Context):
-        dec = ctx.verb.declaration.lower()
-        return any([dec == "silent", dec == "silence"])
+    ACCEPTED_NAMES = ("silent", "silence")
 
     def process(self, ctx: Context):
         if "silent" in ctx.response.actions.keys():
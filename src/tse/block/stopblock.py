@@ -24,9 +24,7 @@ class StopBlock(Block):
         # enforces providing arguments for a tag
     """
 
-    def will_accept(self, ctx: Context) -> bool:
-        dec = ctx.verb.declaration.lower()
-        return dec in ("stop", "halt", "error")
+    ACCEPTED_NAMES = ("stop", "halt", "error")
 
     def process(self, ctx: Context) -> Optional[str]:
         if ctx.verb.parameter is None:
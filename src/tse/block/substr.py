@@ -5,9 +5,7 @@ from ..interpreter import Context
 
 
 class SubstringBlock(Block):
-    def will_accept(self, ctx: Context) -> bool:
-        dec = ctx.verb.declaration.lower()
-        return any([dec == "substr", dec == "substring"])
+    ACCEPTED_NAMES = ("substr", "substring")
 
     def process(self, ctx: Context) -> Optional[str]:
         try:
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Tuple
 
 
 class Block:
@@ -6,8 +6,18 @@ class Block:
     The base class for TagScript blocks.
 
     Implementations must subclass this to create new blocks.
+
+    Attributes
+    ----------
+    ACCEPTED_NAMES: Optional[Tuple[str, ...]]
+        The lowercased declarations accepted by this block, used by the
+        interpreter to look up blocks without calling :meth:`will_accept`.
+        Blocks that accept anything else must leave this as ``None`` and
+        implement :meth:`will_accept`.
     """
 
+    ACCEPTED_NAMES: Optional[Tuple[str, ...]] = None
+
     def __init__(self):
         pass
 
@@ -18,7 +28,7 @@ class Block:
         """
         Describes whether the block is valid for the given `Context`.
 
-        Subclasses must implement this.
+        Subclasses must implement this, unless :attr:`ACCEPTED_NAMES` is set.
 
         Parameters
         ----------
@@ -35,7 +45,9 @@ class Block:
         NotImplementedError
             The subclass did not implement this required method.
         """
-        raise NotImplementedError
+        if self.ACCEPTED_NAMES is None:
+            raise NotImplementedError
+        return ctx.verb.declaration.lower() in self.ACCEPTED_NAMES
 
     def pre_process(self, ctx: "interpreter.Context"):
         return None
@@ -1,5 +1,5 @@
-from itertools import islice
-from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
 
 from .exceptions import ProcessError, TagScriptError, WorkloadExceededError
 from .interface import Adapter, Block
@@ -9,9 +9,12 @@ from .verb import Verb
 __all__ = (
     "Node",
     "build_node_tree",
+    "VerbNode",
+    "Program",
     "Response",
     "Context",
     "Interpreter",
+    "ProgramCache",
 )
 
 
@@ -50,6 +53,55 @@ def build_node_tree(message: str) -> List[Node]:
     return nodes
 
 
+class VerbNode:
+    """
+    A compiled TagScript block.
+
+    Attributes
+    ----------
+    parts: List[Union[str, VerbNode]]
+        Literal segments and nested blocks between the braces.
+    verb: Optional[Verb]
+        The parsed verb, only available if the block has no nested blocks
+        since nested blocks' output is part of the verb.
+    blocks: Optional[List[Block]]
+        Blocks that may accept the verb, only available along with `verb`.
+    """
+
+    __slots__ = ("parts", "verb", "blocks")
+
+    def __init__(self):
+        self.parts: List[Union[str, VerbNode]] = []
+        self.verb: Optional[Verb] = None
+        self.blocks: Optional[List[Block]] = None
+
+    def __repr__(self):
+        return "<VerbNode parts={0.parts!r}>".format(self)
+
+
+class Program:
+    """
+    A compiled TagScript string, can be run any number of times with
+    :meth:`Interpreter.run`.
+
+    Attributes
+    ----------
+    source: str
+        The TagScript string this program is compiled from.
+    parts: List[Union[str, VerbNode]]
+        Top-level literal segments and blocks.
+    """
+
+    __slots__ = ("source", "parts")
+
+    def __init__(self, source: str, parts: List[Union[str, VerbNode]]):
+        self.source: str = source
+        self.parts: List[Union[str, VerbNode]] = parts
+
+    def __repr__(self):
+        return "<Program parts={0.parts!r}>".format(self)
+
+
 class Response:
     """
     Response is another packaged class that contains data
@@ -109,71 +161,148 @@ class Interpreter:
     Attributes
     ----------
     blocks: List[Block]
-        A list of blocks to be used for TagScript processing.
+        A list of blocks to be used for TagScript processing. Blocks are
+        indexed on construction, modifying the list afterwards has no effect.
     """
 
     def __init__(self, blocks: List[Block]):
         self.blocks: List[Block] = blocks
+        # Blocks without ACCEPTED_NAMES, checked with will_accept for every verb
+        self._fallback: List[Block] = [b for b in blocks if b.ACCEPTED_NAMES is None]
+        # Declaration -> blocks that may accept it, in the same order as `blocks`
+        self._dispatch_table: Dict[str, List[Block]] = {}
+        for b in blocks:
+            for name in b.ACCEPTED_NAMES or ():
+                if name not in self._dispatch_table:
+                    self._dispatch_table[name] = [c for c in blocks if c.ACCEPTED_NAMES is None or name in c.ACCEPTED_NAMES]
 
     def __repr__(self):
         return "<Interpreter blocks={0.blocks!r}>".format(self)
 
-    def _get_acceptors(self, ctx: Context, node: Node):
-        acceptors: List[Block] = [b for b in self.blocks if b.will_accept(ctx)]
+    def _get_blocks(self, verb: Verb) -> List[Block]:
+        return self._dispatch_table.get(verb.declaration.lower(), self._fallback)
+
+    def _dispatch(self, ctx: Context, blocks: Optional[List[Block]] = None) -> Optional[str]:
+        if blocks is None:
+            blocks = self._get_blocks(ctx.verb)
+        # Indexed blocks already accept the declaration
+        acceptors: List[Block] = [b for b in blocks if b.ACCEPTED_NAMES is not None or b.will_accept(ctx)]
         for b in acceptors:
             value = b.process(ctx)
             if value is not None:  # Value found? We're done here.
-                node.output = value
-                break
+                return value
+        return None
+
+    def compile(self, message: str, *, verb_limit: int = 2000) -> Program:
+        """Compiles a TagScript string into a reusable :class:`Program`.
 
-    def _solve(
-        self, message: str, node_ordered_list: List[Node], response: Response, charlimit: int, *, verb_limit: int = 2000
-    ):
-        final = message
+        Blocks are matched the same way as :func:`build_node_tree`, verbs
+        without nested blocks are parsed and dispatched here instead of on
+        every run.
+        """
+        root = VerbNode()
+        opened: List[Tuple[VerbNode, int]] = []
+        last = 0
+
+        def current() -> VerbNode:
+            return opened[-1][0] if opened else root
+
+        for i, ch in enumerate(message):
+            if ch == "{":
+                if last < i:
+                    current().parts.append(message[last:i])
+                opened.append((VerbNode(), i))
+                last = i + 1
+            elif ch == "}" and opened:
+                node, start = opened.pop()
+                if last < i:
+                    node.parts.append(message[last:i])
+                if not any(isinstance(part, VerbNode) for part in node.parts):
+                    node.verb = Verb(message[start : i + 1], limit=verb_limit)
+                    node.blocks = self._get_blocks(node.verb)
+                current().parts.append(node)
+                last = i + 1
+
+        if last < len(message):
+            current().parts.append(message[last:])
+
+        # Unclosed braces are just text, their nested blocks still count
+        for node, _ in opened:
+            root.parts.append("{")
+            root.parts.extend(node.parts)
+
+        return Program(message, root.parts)
+
+    def _run(self, program: Program, response: Response, charlimit: Optional[int], *, verb_limit: int = 2000) -> str:
+        # Blocks' output replace them in a segment list instead of rebuilding
+        # the whole string, so the cost is linear in the script size
+        output: List[str] = []
         total_work = 0
 
-        for i, node in enumerate(node_ordered_list):
-            # Get the updated verb string from coordinates and make the context
-            node.verb = Verb(final[node.coordinates[0] : node.coordinates[1] + 1], limit=verb_limit)
-            ctx = Context(node.verb, response, self, message)
+        # Blocks are solved innermost first, in the order they're closed
+        stack = [iter(program.parts)]
+        opened: List[Tuple[VerbNode, int]] = []
+        while stack:
+            part = next(stack[-1], None)
+            if isinstance(part, str):
+                output.append(part)
+                continue
+            if part is not None:
+                opened.append((part, len(output)))
+                output.append("{")
+                stack.append(iter(part.parts))
+                continue
+
+            stack.pop()
+            if not opened:
+                break
 
-            # Get all blocks that will attempt to take this
-            self._get_acceptors(ctx, node)
-            if node.output is None:
-                continue  # If there was no value output, no need to text deform.
+            node, start = opened.pop()
+            output.append("}")
+            verb = node.verb if node.verb is not None else Verb("".join(output[start:]), limit=verb_limit)
+            value = self._dispatch(Context(verb, response, self, program.source), node.blocks)
+            if value is None:
+                continue  # Left as is, including nested blocks' output
 
             if charlimit is not None:
-                total_work = total_work + len(node.output)  # Record how much we've done so far, for the rate limit
+                total_work += len(value)
                 if total_work > charlimit:
                     raise WorkloadExceededError(
                         "The TSE interpreter had its workload exceeded. The total characters "
                         f"attempted were {total_work}/{charlimit}"
                     )
 
-            start, end = node.coordinates
-            message_slice_len = (end + 1) - start
-            replacement_len = len(node.output)
-            differential = replacement_len - message_slice_len  # The change in size of `final` after the change is applied
+            del output[start:]
+            output.append(value)
             if "TSE_STOP" in response.actions:
-                return final[:start] + node.output
-            final = final[:start] + node.output + final[end + 1 :]
-
-            # if each coordinate is later than `start` then it needs the diff applied.
-            for future_n in islice(node_ordered_list, i + 1, None):
-                new_start = None
-                new_end = None
-                if future_n.coordinates[0] > start:
-                    new_start = future_n.coordinates[0] + differential
-                else:
-                    new_start = future_n.coordinates[0]
-
-                if future_n.coordinates[1] > start:
-                    new_end = future_n.coordinates[1] + differential
-                else:
-                    new_end = future_n.coordinates[1]
-                future_n.coordinates = (new_start, new_end)
-
-        return final
+                break
+
+        return "".join(output)
+
+    def run(self, program: Program, seed_variables: Dict[str, Adapter] = None, charlimit: Optional[int] = None) -> Response:
+        """Runs a compiled TagScript program.
+
+        Behaves exactly like :meth:`process`, without compiling the TagScript
+        string every time.
+        """
+        response = Response()
+
+        if seed_variables is not None:
+            response.variables = {**response.variables, **seed_variables}
+
+        try:
+            output = self._run(program, response, charlimit)
+        except TagScriptError:
+            raise
+        except Exception as error:
+            raise ProcessError(error) from error
+
+        # Dont override an overridden response.
+        if response.body is None:
+            response.body = output.strip("\n ")
+        else:
+            response.body = response.body.strip("\n ")
+        return response
 
     def process(self, message: str, seed_variables: Dict[str, Adapter] = None, charlimit: Optional[int] = None) -> Response:
         """Processes a given TagScript string.
@@ -201,25 +330,45 @@ class Interpreter:
         ProcessError
             An unexpected error occurred while processing blocks.
         """
-        response = Response()
-        message_input = message
+        return self.run(self.compile(message), seed_variables, charlimit)
 
-        # Apply variables fed into `process`
-        if seed_variables is not None:
-            response.variables = {**response.variables, **seed_variables}
 
-        node_ordered_list = build_node_tree(message_input)
+class ProgramCache:
+    """
+    Least recently used cache of compiled programs.
 
-        try:
-            output = self._solve(message_input, node_ordered_list, response, charlimit)
-        except TagScriptError:
-            raise
-        except Exception as error:
-            raise ProcessError(error) from error
+    Programs are keyed by the given key (e.g. tag's ID) and the TagScript
+    string's hash, so edited tags are recompiled.
 
-        # Dont override an overridden response.
-        if response.body is None:
-            response.body = output.strip("\n ")
-        else:
-            response.body = response.body.strip("\n ")
-        return response
+    Attributes
+    ----------
+    interpreter: Interpreter
+        The interpreter used to compile the programs.
+    maxsize: int
+        The maximum amount of programs to keep.
+    """
+
+    __slots__ = ("interpreter", "maxsize", "_programs")
+
+    def __init__(self, interpreter: Interpreter, maxsize: int = 1024):
+        self.interpreter: Interpreter = interpreter
+        self.maxsize: int = maxsize
+        self._programs: "OrderedDict[Tuple[Hashable, int], Program]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._programs)
+
+    def get(self, key: Hashable, message: str) -> Program:
+        """Gets the compiled program, compiles it if it's not cached."""
+        cache_key = (key, hash(message))
+        program = self._programs.get(cache_key)
+        # Source is compared in case of hash collision
+        if program is not None and program.source == message:
+            self._programs.move_to_end(cache_key)
+            return program
+
+        program = self._programs[cache_key] = self.interpreter.compile(message)
+        self._programs.move_to_end(cache_key)
+        if len(self._programs) > self.maxsize:
+            self._programs.popitem(last=False)
+        return program
@@ -0,0 +1,103 @@
+"""
+This Source Code Form is subject to the terms of the Mozilla Public
+License, v. 2.0. If a copy of the MPL was not distributed with this
+file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import time
+import traceback
+from typing import Any, Callable
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+
+__all__ = ("QueryAudit",)
+
+
+# Frames from these paths are skipped when looking for the query's call site
+_IGNORED_PATHS = (
+    os.sep + "tortoise" + os.sep,
+    os.sep + "asyncio" + os.sep,
+    os.sep + "pypika" + os.sep,
+    __file__,
+)
+
+
+class QueryAudit:
+    """Log slow and unindexed queries with their call site
+
+    Only meant for debugging, every distinct query is EXPLAIN-ed once which
+    is not free. Queries inside transactions are not audited.
+    """
+
+    __slots__ = ("threshold", "logger", "explained", "_dialect")
+
+    def __init__(self, threshold: float) -> None:
+        # In milliseconds
+        self.threshold: float = threshold
+        self.logger: logging.Logger = logging.getLogger("discord")
+        # query -> is unindexed
+        self.explained: dict[str, bool] = {}
+        self._dialect: str = ""
+
+    def install(self, client: BaseDBAsyncClient) -> None:
+        self._dialect = client.capabilities.dialect
+        # Unwrapped, so EXPLAIN queries are not audited
+        explain = client.execute_query_dict
+        for name in ("execute_query", "execute_query_dict", "execute_insert", "execute_many"):
+            setattr(client, name, self._wrap(getattr(client, name), explain))
+
+    @staticmethod
+    def callSite() -> str:
+        for frame in reversed(traceback.extract_stack()):
+            if not any(path in frame.filename for path in _IGNORED_PATHS):
+                return f"{frame.filename}:{frame.lineno} in {frame.name}"
+        return "unknown"
+
+    def _wrap(self, original: Callable, explain: Callable) -> Callable:
+        @functools.wraps(original)
+        async def wrapped(query: str, *args, **kwargs) -> Any:
+            # Stack has to be captured before awaiting anything
+            callSite = self.callSite()
+            start = time.perf_counter()
+            result = await original(query, *args, **kwargs)
+
+            elapsed = (time.perf_counter() - start) * 1000
+            if elapsed >= self.threshold:
+                self.logger.warning(f"Slow query ({elapsed:.2f}ms) at {callSite}: {query}")
+            if query not in self.explained:
+                await self._explain(explain, query, args[0] if args else kwargs.get("values"), callSite)
+            return result
+
+        return wrapped
+
+    async def _explain(self, execute: Callable, query: str, values: Any, callSite: str) -> None:
+        self.explained[query] = False
+        if not query.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            return
+
+        if self._dialect == "sqlite":
+            prefix, marker = "EXPLAIN QUERY PLAN ", "SCAN "
+        elif self._dialect == "postgres":
+            prefix, marker = "EXPLAIN ", "Seq Scan"
+        else:
+            # Unsupported, only slow queries are logged
+            return
+
+        try:
+            rows = await execute(prefix + query, values)
+        except Exception as err:
+            self.logger.debug(f"Failed to explain query: {err}")
+            return
+
+        plan = "\n".join(str(list(row.values())[-1]) for row in rows)
+        # SQLite's "SCAN x USING INDEX" still uses index
+        scans = [line for line in plan.splitlines() if marker in line and "INDEX" not in line.upper()]
+        if scans:
+            self.explained[query] = True
+            self.logger.warning(f"Unindexed query at {callSite}: {query}\n{plan}")
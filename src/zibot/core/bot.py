@@ -7,14 +7,15 @@ file, You can obtain one at http://mozilla.org/MPL/2.0/.
 from __future__ import annotations
 
 import asyncio
-import copy
 import datetime
+import functools
+import itertools
 import json
 import logging
 import os
 import re
-import shutil
 import sys
+import time
 from collections import Counter
 from contextlib import suppress
 from typing import TYPE_CHECKING, Any
@@ -23,7 +24,6 @@ import aiohttp
 import discord
 import zmq
 import zmq.asyncio
-from aerich import Command as AerichCommand
 from discord.ext import commands, tasks
 from discord.ui import Button
 from tortoise import Tortoise, connections
@@ -33,17 +33,31 @@ from tortoise.models import Model
 from .. import __version__ as botVersion
 from ..exts.meta._custom_command import CustomCommand
 from ..exts.meta._errors import CCommandDisabled, CCommandNotFound, CCommandNotInGuild
-from ..exts.meta._utils import getDisabledCommands
+from ..exts.meta._usage import CustomCommandUsage
+from ..exts.meta._utils import getCustomCommandNames, getDisabledCommands
 from ..exts.timer.timer import Timer, TimerData
-from ..utils import utcnow
+from ..utils import loadCaseCount, utcnow
 from ..utils.format import formatCmdName
 from . import db
+from .audit import QueryAudit
 from .colour import ZColour
 from .config import Config
 from .context import Context
-from .data import JSON, Blacklist, Cache, CacheDictProperty, CacheListProperty
+from .data import (
+    JSON,
+    Blacklist,
+    Cache,
+    CacheDictProperty,
+    CacheListProperty,
+    CacheProperty,
+)
 from .guild import GuildWrapper
 from .i18n import FluentTranslator, Localization
+from .pool import PoolMonitor
+from .prefix import Prefix, PrefixMatcher, loadPrefixes
+from .resolver import MessageFilter, resolveCommand
+from .schema import applyMigrations, isSchemaChanged
+from .settings import GuildConfigStore, GuildSettings
 
 
 EXTS = []
@@ -59,16 +73,33 @@ for filename in os.listdir(FMT):
 
 
 EMOJI_REGEX = re.compile(r";(?P<name>[a-zA-Z0-9_]{2,32});")
+# Users that are allowed to use emoji without nitro
+EMOJI_USERS = (186713080841895936,)
+
+
+# Cache property -> (table, column), column is None when the cached value is
+# the whole row
+WARMUP_TABLES: dict[str, tuple[type[Model], str | None]] = {
+    "prefixes": (db.Prefixes, "prefix"),
+    "guildConfigs": (db.GuildConfigs, None),
+    "guildChannels": (db.GuildChannels, None),
+    "guildRoles": (db.GuildRoles, None),
+    "disabled": (db.Disabled, "command"),
+    "guildMutes": (db.GuildMutes, "mutedId"),
+}
+WARMUP_CHUNK_SIZE = 500
+# Guilds per query when reconciling guilds table on boot
+RECONCILE_CHUNK_SIZE = 1000
+
+
+async def loadGuildMutes(guildId: int) -> list[int]:
+    return [m.mutedId for m in await db.GuildMutes.filter(guild_id=guildId)]
 
 
 async def _callablePrefix(bot: ziBot, message: discord.Message) -> list:
     """Callable Prefix for the bot."""
-    base = [bot.defPrefix]
-    guild: GuildWrapper | None = GuildWrapper.fromContext(message.guild, bot)
-    if guild:
-        prefixes = await guild.getPrefixes()
-        base.extend(prefixes)
-    return commands.when_mentioned_or(*sorted(base))(bot, message)
+    matcher = await bot.getPrefixMatcher(message.guild)
+    return matcher.prefixes
 
 
 __all__ = ("ziBot",)
@@ -134,6 +165,10 @@ class ziBot(commands.Bot):
         # bot's default prefix
         self.defPrefix: str = self.config.defaultPrefix
 
+        # Guilds that are active before the bot restarted, used to warm up
+        # the caches
+        self.recentGuilds: JSON = JSON("data/recentGuilds.json", {"guilds": []})
+
         # News, shows up in help command
         self.news: dict[str, Any] = JSON(
             "data/news.json",
@@ -143,8 +178,15 @@ class ziBot(commands.Bot):
             },
         )
 
+        # Write-behind store for guild configs
+        self.configStore: GuildConfigStore = GuildConfigStore()
+        self.poolMonitor: PoolMonitor = PoolMonitor(self.config.poolAcquireTimeout)
+        # Custom commands' usage, written to database in batches
+        self.ccUsage: CustomCommandUsage = CustomCommandUsage()
+
         # Caches
         # TODO: Improve type checking support
+        cacheSize = self.config.guildCacheSize
         self.cache: Cache = (
             Cache()
             .add(
@@ -152,25 +194,62 @@ class ziBot(commands.Bot):
                 cls=CacheListProperty,
                 unique=True,
                 limit=15,
+                maxEntries=cacheSize,
+                loader=loadPrefixes,
+                onDrop=lambda guildId: self.prefixMatchers.pop(guildId, None),
             )
             .add(
                 "guildConfigs",
                 cls=CacheDictProperty,
+                maxEntries=cacheSize,
+                loader=functools.partial(self.configStore.load, db.GuildConfigs),
             )
             .add(
                 "guildChannels",
                 cls=CacheDictProperty,
+                maxEntries=cacheSize,
+                loader=functools.partial(self.configStore.load, db.GuildChannels),
             )
             .add(
                 "guildRoles",
                 cls=CacheDictProperty,
+                maxEntries=cacheSize,
+                loader=functools.partial(self.configStore.load, db.GuildRoles),
             )
             .add(
                 "guildMutes",
                 cls=CacheListProperty,
                 unique=True,
+                maxEntries=cacheSize,
+                loader=loadGuildMutes,
+            )
+            .add(
+                # Unbounded, reloading it while cases are being created may
+                # result in duplicate case number
+                "caseCounts",
+                cls=CacheProperty,
+                loader=loadCaseCount,
+            )
+            .add(
+                "guildSettings",
+                cls=CacheProperty,
+                maxEntries=cacheSize,
+                loader=self.buildGuildSettings,
             )
         )
+        # Shared between guilds, only used to tell which snapshot is newer
+        self._settingsVersion = itertools.count(1)
+
+        # Compiled prefix matcher for each guilds (0 for DMs), rebuilt when
+        # guild's prefixes changed, dropped along with guild's cached prefixes
+        self.prefixMatchers: dict[int, PrefixMatcher] = {}
+
+        # Reusable GuildWrapper for each guilds, dropped when the bot leaves
+        # the guild
+        self.guildWrappers: dict[int, GuildWrapper] = {}
+
+        # Early-reject stage for messages that can't be processed
+        self.messageFilter: MessageFilter = MessageFilter(self, emojiUsers=EMOJI_USERS)
 
         self.pubSocket: zmq.asyncio.Socket | None = None
         self.subSocket: zmq.asyncio.Socket | None = None
@@ -184,9 +263,9 @@ class ziBot(commands.Bot):
             """Global check"""
             if not ctx.guild:
                 return True
-            disableCmds = await getDisabledCommands(self, ctx.guild.id)
-            cmdName = formatCmdName(ctx.command)
-            if cmdName in disableCmds:
+            # Only hit the database when it's not cached yet
+            disableCmds: frozenset[str] = await getDisabledCommands(self, ctx.guild.id)
+            if ctx.command.qualified_name in disableCmds:
                 if not ctx.author.guild_permissions.manage_guild:
                     raise commands.DisabledCommand
             return True
@@ -230,54 +309,27 @@ class ziBot(commands.Bot):
             with suppress(DBConnectionError, OperationalError):
                 await Tortoise._drop_databases()
 
+        self.messageFilter.compile(self.requireUser().id)
+
         self.i18n = await Localization.init()
         await self.tree.set_translator(FluentTranslator(self))
 
-        migrationDir = self.config.migrationDir
-
-        aerichCmd = AerichCommand(
-            tortoise_config=self.config.tortoiseConfig,
-            location=str(migrationDir),
-        )
-
-        if migrationDir.exists():
-            await aerichCmd.init()
-
-            try:
-                update = await aerichCmd.migrate()
-
-                if update:
-                    upgrades = await aerichCmd.upgrade()
-                    if len(upgrades) > 0:
-                        self.logger.warning(f"DB Upgrades done ({len(upgrades)}): {', '.join(upgrades)}")
-
-            except AttributeError:
-                self.logger.warning(
-                    "Unable to retrieve model history from the database! " "Creating model history from scratch..."
-                )
-
-                self._cleanMigrationDir()
+        if not self.config.test:
+            await Tortoise.init(config=self.config.tortoiseConfig)
 
-                await aerichCmd.init_db(True)
+        # Test database is always fresh
+        if self.config.test or await isSchemaChanged():
+            await applyMigrations(self.config)
         else:
-            await aerichCmd.init_db(True)
+            self.logger.warning("Database schema is unchanged, skipping migrations")
 
-        await Tortoise.generate_schemas(safe=True)
+        self.poolMonitor.install(connections.get("default"))
+        if self.config.queryAudit:
+            QueryAudit(self.config.queryAudit).install(connections.get("default"))
+            self.logger.warning(f"Query audit enabled (slow query threshold: {self.config.queryAudit}ms)")
 
         self.loop.create_task(self.afterReady())
 
-    def _cleanMigrationDir(self):
-        directory = self.config.migrationDir
-        for filename in os.listdir(directory):
-            filePath = directory / filename
-            try:
-                if os.path.isfile(filePath) or os.path.islink(filePath):
-                    os.unlink(filePath)
-                elif os.path.isdir(filePath):
-                    shutil.rmtree(filePath)
-            except Exception as err:
-                print(f"Failed to delete {filePath}. Reason: {err}")
-
     async def afterReady(self) -> None:
         """`setup_hook` but wait until ready"""
         if not self.config.test:
@@ -300,6 +352,8 @@ class ziBot(commands.Bot):
                 self.tree.get_command(merge.name).add_command(command.app_command)  # type: ignore
                 self.tree.remove_command(command.name)
 
+        await self.warmUpCache()
+
         if not hasattr(self, "uptime"):
             self.uptime: datetime.datetime = utcnow()
 
@@ -368,39 +422,29 @@ class ziBot(commands.Bot):
     async def getGuildConfigs(
         self,
         guildId: int,
-        table: str | Model = "GuildConfigs",  # type: ignore
+        table: str | type[Model] = "GuildConfigs",  # type: ignore
     ) -> dict[str, Any]:
         # TODO - Cleaner caching system, use the cache system directly to
         # handle these stuff
         if isinstance(table, str):
-            table: Model | None = getattr(db, table, None)  # type: ignore
+            table: type[Model] | None = getattr(db, table, None)
 
         if table is None:
             raise RuntimeError("Huh?")
 
-        # Get guild configs and maybe cache it
+        # Get guild configs, will be loaded from database if it's not cached
         cached: CacheDictProperty = getattr(self.cache, table._meta.db_table)
-        if cached.get(guildId) is None:
-            # Executed when guild configs is not in the cache
-            config = await table.filter(guild_id=guildId).first().values() or {}  # type: ignore
-
-            for i in ("id", "guild_id"):
-                config.pop(i, None)
-            cached.set(guildId, config)
-        return cached.get(guildId, {})
+        return await cached.fetch(guildId)
 
-    async def getGuildConfig(self, guildId: int, configType: str, table: str | Model = "GuildConfigs") -> Any | None:
+    async def getGuildConfig(self, guildId: int, configType: str, table: str | type[Model] = "GuildConfigs") -> Any | None:
         # Get guild's specific config
         configs: dict = await self.getGuildConfigs(guildId, table)
         return configs.get(configType)
 
     async def setGuildConfig(
-        self, guildId: int, configType: str, configValue, table: str | Model = "GuildConfigs"
+        self, guildId: int, configType: str, configValue, table: str | type[Model] = "GuildConfigs"
     ) -> Any | None:
-        if isinstance(table, str):
-            _table: Model = getattr(db, table, None)  # type: ignore
-        else:
-            _table: Model = table
+        _table: type[Model] | None = getattr(db, table, None) if isinstance(table, str) else table
 
         if not _table:
             raise RuntimeError("Wtf?")
@@ -411,21 +455,97 @@ class ziBot(commands.Bot):
             # No need to overwrite database value
             return config
 
-        kwargs = {
-            "guild_id": guildId,
-            configType: configValue,
-        }
-
-        await _table.create(**kwargs)
-        # await _table.update_or_create(**kwargs)
+        # Written to database later, coalesced with other changes
+        self.configStore.set(_table, guildId, configType, configValue)
 
         # Overwrite current configs
         cached: CacheDictProperty = getattr(self.cache, _table._meta.db_table)
         newData = {configType: configValue}
         cached.set(guildId, newData)
+        await self.refreshGuildSettings(guildId)
 
         return cached.get(guildId, {}).get(configType, None)
 
+    async def buildGuildSettings(self, guildId: int) -> GuildSettings:
+        # Taken before reading, so snapshot built from older data always has
+        # lower version
+        version = next(self._settingsVersion)
+        prefixes, configs, channels, roles = await asyncio.gather(
+            self.cache.prefixes.fetch(guildId),  # type: ignore
+            self.cache.guildConfigs.fetch(guildId),  # type: ignore
+            self.cache.guildChannels.fetch(guildId),  # type: ignore
+            self.cache.guildRoles.fetch(guildId),  # type: ignore
+        )
+        return GuildSettings(guildId, version, prefixes=prefixes, configs=configs, channels=channels, roles=roles)
+
+    async def getGuildSettings(self, guildId: int) -> GuildSettings:
+        """Get guild's settings snapshot, will be loaded if it's not cached"""
+        return await self.cache.guildSettings.fetch(guildId)  # type: ignore
+
+    async def refreshGuildSettings(self, guildId: int) -> GuildSettings:
+        """Rebuild guild's settings snapshot and swap it with the cached one"""
+        cached: CacheProperty = self.cache.guildSettings  # type: ignore
+        settings = await self.buildGuildSettings(guildId)
+        current: GuildSettings | None = cached.get(guildId)
+        if current is not None and current.version > settings.version:
+            # Newer snapshot was swapped in while this one is being built
+            return current
+        cached.set(guildId, settings)
+        return settings
+
+    async def warmUpCache(self) -> None:
+        """Bulk load guild caches, chunked to avoid huge queries"""
+        mode = self.config.cacheWarmUp
+        if mode == "none":
+            return
+
+        if mode == "recent":
+            guildIds = [i for i in self.recentGuilds.get("guilds", []) if self.get_guild(i)]
+        else:
+            guildIds = [i.id for i in self.guilds]
+
+        if self.config.guildCacheSize:
+            # No point loading guilds that'll get evicted right away
+            guildIds = guildIds[: self.config.guildCacheSize]
+
+        start = time.perf_counter()
+        for index in range(0, len(guildIds), WARMUP_CHUNK_SIZE):
+            chunk = guildIds[index : index + WARMUP_CHUNK_SIZE]
+
+            for name, (table, column) in WARMUP_TABLES.items():
+                cached: CacheProperty | None = getattr(self.cache, name, None)
+                if cached is None:
+                    continue
+
+                query = table.filter(guild_id__in=chunk)
+                if column:
+                    values: dict[int, Any] = {i: [] for i in chunk}
+                    for guildId, value in await query.values_list("guild_id", column):
+                        values[guildId].append(value)
+                else:
+                    values = {i: {} for i in chunk}
+                    # Descending, so the lowest id wins just like .first()
+                    for row in await query.order_by("-id").values():
+                        row.pop("id", None)
+                        values[row.pop("guild_id")] = row
+
+                for guildId, value in values.items():
+                    # Don't overwrite items that's loaded/modified in the meantime
+                    if guildId not in cached:
+                        cached.set(guildId, value)
+
+        self.logger.warning(f"Cache warmed up ({mode}): {len(guildIds)} guilds in {time.perf_counter() - start:.2f}s")
+
+    async def getPrefixMatcher(self, guild: discord.Guild | None) -> PrefixMatcher:
+        key = guild.id if guild else 0
+        matcher = self.prefixMatchers.get(key)
+        if matcher is None:
+            base = [self.defPrefix]
+            if guild:
+                base.extend(await Prefix(owner=guild, bot=self).get())
+            matcher = self.prefixMatchers[key] = PrefixMatcher(base, self.requireUser().id)
+        return matcher
+
     @tasks.loop(seconds=15)
     async def changingPresence(self) -> None:
         """A loop that change bot's status every 15 seconds."""
@@ -451,35 +571,74 @@ class ziBot(commands.Bot):
     async def manageGuildDeletion(self) -> None:
         """Manages guild deletion from database on boot"""
         timer: Timer | None = self.get_cog("Timer")  # type: ignore
+        timings: dict[str, float] = {}
 
-        dbGuilds = await db.Guilds.all()
-        dbGuilds = [i.id for i in dbGuilds]
-        guildIds = [i.id for i in self.guilds]
-
-        # Insert new guilds
-        await db.Guilds.bulk_create([db.Guilds(id=i) for i in guildIds if i not in dbGuilds])
-
-        scheduledGuilds = await db.Timer.filter(event="guild_del")
-        cancelledScheduleGuilds = [await i.delete() for i in scheduledGuilds if i.owner in guildIds]
-        scheduledGuildIds = [i.id for i in scheduledGuilds]
-
-        # Schedule delete guild where the bot no longer in
+        start = time.perf_counter()
+        guildIds: set[int] = {i.id for i in self.guilds}
+        scheduledGuildIds: set[int] = set(
+            await db.Timer.filter(event="guild_del").values_list("owner", flat=True)  # type: ignore
+        )
+        timings["load"] = time.perf_counter() - start
+
+        # Cancel deletion of guilds the bot rejoined
+        start = time.perf_counter()
+        cancelledScheduleGuilds = scheduledGuildIds & guildIds
+        cancelled = sorted(cancelledScheduleGuilds)
+        for index in range(0, len(cancelled), RECONCILE_CHUNK_SIZE):
+            await db.Timer.filter(event="guild_del", owner__in=cancelled[index : index + RECONCILE_CHUNK_SIZE]).delete()
+        timings["cancel"] = time.perf_counter() - start
+
+        # Schedule delete guild where the bot no longer in, streamed so the
+        # entire table doesn't have to be loaded at once
         now = utcnow()
         when = now + datetime.timedelta(days=self.guildDelDays)
 
-        await db.Timer.bulk_create(
-            [
-                db.Timer(
-                    id=i,
-                    event="guild_del",
-                    extra={"args": [], "kwargs": {}},
-                    expires=when,
-                    created=now,
-                    owner=i,
-                )
-                for i in dbGuilds
-                if i not in guildIds and i not in scheduledGuildIds
-            ]
+        start = time.perf_counter()
+        knownGuildIds: set[int] = set()
+        scheduled = 0
+        lastId = None
+        while True:
+            query = db.Guilds.all().order_by("id").limit(RECONCILE_CHUNK_SIZE)
+            if lastId is not None:
+                query = query.filter(id__gt=lastId)
+            chunk: list[int] = await query.values_list("id", flat=True)  # type: ignore
+            if not chunk:
+                break
+            lastId = chunk[-1]
+
+            knownGuildIds.update(i for i in chunk if i in guildIds)
+            toSchedule = [i for i in chunk if i not in guildIds and i not in scheduledGuildIds]
+            if not toSchedule:
+                continue
+
+            await db.Timer.bulk_create(
+                [
+                    db.Timer(
+                        id=i,
+                        event="guild_del",
+                        extra={"args": [], "kwargs": {}},
+                        expires=when,
+                        created=now,
+                        owner=i,
+                    )
+                    for i in toSchedule
+                ]
+            )
+            scheduled += len(toSchedule)
+        timings["schedule"] = time.perf_counter() - start
+
+        # Insert new guilds
+        start = time.perf_counter()
+        newGuildIds = guildIds - knownGuildIds
+        if newGuildIds:
+            await db.Guilds.bulk_create([db.Guilds(id=i) for i in newGuildIds], batch_size=RECONCILE_CHUNK_SIZE)
+        timings["insert"] = time.perf_counter() - start
+
+        self.logger.warning(
+            f"Guilds reconciled: {len(newGuildIds)} inserted, {scheduled} scheduled for deletion, "
+            f"{len(cancelledScheduleGuilds)} deletion cancelled ("
+            + ", ".join(f"{k}: {v:.2f}s" for k, v in timings.items())
+            + ")"
         )
 
         if not timer:
@@ -504,6 +663,7 @@ class ziBot(commands.Bot):
 
     async def on_guild_remove(self, guild: discord.Guild) -> None:
         """Executed when bot leaves a guild"""
+        self.guildWrappers.pop(guild.id, None)
         await self.waitUntilReady()
         # Schedule deletion
         await self.scheduleDeletion(guild.id, days=self.guildDelDays)
@@ -551,46 +711,22 @@ class ziBot(commands.Bot):
                 getattr(self.cache, dataType).clear(guildId)
             except KeyError:
                 pass
+        self.prefixMatchers.pop(guildId, None)
 
     async def get_context(self, message, *, cls=Context):
         return await super().get_context(message, cls=cls)
 
     async def process_commands(self, message: discord.Message) -> (str | commands.Command | commands.Group) | None:
-        # initial ctx
-        ctx: Context = await self.get_context(message)
+        # Prefix, priority marker, invoked name and argument are parsed only once
+        ctx, parsed = await resolveCommand(self, message)
 
-        if not ctx.prefix:
+        if not parsed:
             return
 
-        # 0 = Built-In, 1 = Custom
-        priority = 0
-        unixStyle = False
-
-        # Handling custom command priority
-        msg = copy.copy(message)
-        # Get msg content without prefix
-        msgContent: str = msg.content[len(ctx.prefix) :]
-        # TODO: Add ability add custom priority prefix
-        if msgContent.startswith(">") or msgContent.startswith("!") or (unixStyle := msgContent.startswith("./")):
-            # Also support `./` for unix-style of launching custom scripts
-            priority = 1
-
-            # Turn `>command` into `command`
-            msgContent = msgContent[2 if unixStyle else 1 :]
-
-            # Properly get command when priority is 1
-            msg.content = ctx.prefix + msgContent
-
-            # This fixes the problem, idk how ._.
-            ctx = await self.get_context(msg)
-
-        # Get arguments for custom commands
-        tmp = msgContent.split(" ")
-        args = (ctx, str(tmp.pop(0)).lower(), " ".join(tmp))
-
-        # Check if user can run the command
+        # Check if user can run the command, not needed when custom command
+        # is prioritized since invoke() will check it anyway
         canRun = False
-        if ctx.command:
+        if ctx.command and parsed.priority < 1:
             try:
                 canRun = await ctx.command.can_run(ctx)
             except Exception:
@@ -599,10 +735,16 @@ class ziBot(commands.Bot):
         # Apparently commands are callable, so ctx.invoke longer needed
         executeCC = self.get_command("command run")
 
-        # Handling command invoke with priority
-        if (not canRun or priority >= 1) and executeCC:
+        # Handling command invoke with priority, names are checked first so
+        # misses (typos, other bots' prefix) never reach the database
+        if (
+            (not canRun or parsed.priority >= 1)
+            and executeCC
+            and ctx.guild
+            and parsed.invokedName in await getCustomCommandNames(self, ctx.guild.id)
+        ):
             with suppress(CCommandNotFound, CCommandNotInGuild, CCommandDisabled):
-                await executeCC(*args)  # type: ignore
+                await executeCC(ctx, parsed.invokedName, parsed.argument)  # type: ignore
                 self.customCommandUsage += 1
                 return ""
         # Since priority is 0 and it can run the built-in command,
@@ -612,7 +754,7 @@ class ziBot(commands.Bot):
         return ctx.command
 
     async def processNoNitroEmoji(self, message: discord.Message):
-        if message.author.id != 186713080841895936:
+        if message.author.id not in EMOJI_USERS:
             return
 
         matches = EMOJI_REGEX.findall(message.content)
@@ -652,20 +794,12 @@ class ziBot(commands.Bot):
         self.commandUsage[formatCmdName(command)] += 1
 
     async def on_message(self, message: discord.Message) -> None:
-        if (
-            message.author.bot
-            or message.author.id in self.blacklist.users
-            or (message.guild and message.guild.id in self.blacklist.guilds)
-        ) and message.author.id not in self.ownerIds:
-            # dont accept commands from bot
+        if not self.messageFilter.accepts(message):
             return
 
-        me: discord.ClientUser = self.user  # type: ignore
-
         # if bot is mentioned without any other message, send prefix list
-        guild = GuildWrapper.fromContext(message.guild, self)
-        pattern = f"<@(!?){me.id}>"
-        if re.fullmatch(pattern, message.content) and guild:
+        if self.messageFilter.isMentionOnly(message.content) and (guild := GuildWrapper.fromContext(message.guild, self)):
+            me: discord.ClientUser = self.requireUser()
             e = discord.Embed(
                 description=await guild.getFormattedPrefixes(),
                 colour=ZColour.rounded(),
@@ -676,17 +810,10 @@ class ziBot(commands.Bot):
         await self.process(message)
 
     async def on_message_edit(self, _, after):
-        message = after
-
-        # dont accept commands from bot
-        if (
-            message.author.bot
-            or message.author.id in self.blacklist.users
-            or (message.guild and message.guild.id in self.blacklist.guilds)
-        ) and message.author.id not in self.ownerIds:
+        if not self.messageFilter.accepts(after):
             return
 
-        await self.process(message)
+        await self.process(after)
 
     async def waitUntilReady(self):
         if self.config.test:
@@ -705,7 +832,16 @@ class ziBot(commands.Bot):
         if not self.config.test:
             await super().close()
 
-        # Close database connections
+        # Guilds that has sent a message since the bot started
+        self.recentGuilds["guilds"] = [i for i in self.prefixMatchers if i]
+        self.recentGuilds.dump()
+
+        # Write pending changes before closing database connections
+        for store in (self.configStore, self.ccUsage):
+            try:
+                await store.close()
+            except Exception as err:
+                self.logger.error(f"Failed to close {type(store).__name__}: {err}")
         await connections.close_all()
         if self.config.test:
             await Tortoise._drop_databases()
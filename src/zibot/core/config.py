@@ -10,6 +10,8 @@ import sys
 from pathlib import Path
 from typing import Any
 
+from tortoise.backends.base.config_generator import expand_db_url
+
 
 class Config:
     """A class that holds the bot's configuration"""
@@ -31,6 +33,13 @@ class Config:
         "destUrl",
         "isDataMigration",
         "migrationDir",
+        "guildCacheSize",
+        "cacheWarmUp",
+        "queryAudit",
+        "poolMinSize",
+        "poolMaxSize",
+        "poolAcquireTimeout",
+        "statementCacheSize",
     )
 
     def __init__(
@@ -50,6 +59,13 @@ class Config:
         destUrl: str | None = None,
         isDataMigration: bool = False,
         migrationFolder: str | None = None,
+        guildCacheSize: int | str | None = None,
+        cacheWarmUp: str | None = None,
+        queryAudit: float | str | None = None,
+        poolMinSize: int | str | None = None,
+        poolMaxSize: int | str | None = None,
+        poolAcquireTimeout: float | str | None = None,
+        statementCacheSize: int | str | None = None,
     ):
         self.token = token
         self.defaultPrefix = defaultPrefix or ">"
@@ -66,6 +82,45 @@ class Config:
         self.test = test
         self.zmqPorts = zmqPorts or {}
         self.migrationDir = Path(migrationFolder or "migrations")
+        # Max guilds kept in each guild data cache, 0 means unbounded
+        self.guildCacheSize: int = 10000 if guildCacheSize is None else int(guildCacheSize)
+        # Which guilds' cache to load on startup: "all", "recent" or "none"
+        self.cacheWarmUp: str = (cacheWarmUp or "recent").lower()
+        if self.cacheWarmUp not in ("all", "recent", "none"):
+            raise ValueError("cacheWarmUp can only be 'all', 'recent' or 'none'")
+        # Log queries slower than this (in milliseconds) and unindexed
+        # queries, 0 means disabled
+        self.queryAudit: float = float(queryAudit or 0)
+        # Connection pool settings (PostgreSQL and MySQL only), None means
+        # use Tortoise's/driver's default
+        self.poolMinSize: int | None = None if poolMinSize is None else int(poolMinSize)
+        self.poolMaxSize: int | None = None if poolMaxSize is None else int(poolMaxSize)
+        # In seconds, None means wait forever
+        self.poolAcquireTimeout: float | None = None if poolAcquireTimeout is None else float(poolAcquireTimeout)
+        # Prepared statements cached per connection (asyncpg only)
+        self.statementCacheSize: int | None = None if statementCacheSize is None else int(statementCacheSize)
+
+    @property
+    def databaseConnection(self) -> str | dict[str, Any]:
+        """Database URL, expanded if pool settings need to be applied"""
+        options = {
+            "minsize": self.poolMinSize,
+            "maxsize": self.poolMaxSize,
+        }
+        if all(v is None for v in options.values()) and self.statementCacheSize is None:
+            return self.databaseUrl
+
+        ret = expand_db_url(self.databaseUrl)
+        engine: str = ret["engine"]
+        if engine.endswith("sqlite"):
+            # No connection pool
+            return self.databaseUrl
+
+        if engine.endswith("asyncpg"):
+            options["statement_cache_size"] = self.statementCacheSize
+
+        ret["credentials"].update({k: v for k, v in options.items() if v is not None})
+        return ret
 
     @property
     def tortoiseConfig(self):
@@ -75,7 +130,7 @@ class Config:
         if not ret:
             ret = {
                 "connections": {
-                    "default": self.databaseUrl,
+                    "default": self.databaseConnection,
                 },
                 "apps": {
                     "models": {
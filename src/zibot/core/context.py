@@ -206,10 +206,7 @@ class Context(commands.Context):
 
     @discord.utils.cached_property
     def guild(self) -> GuildWrapper | None:
-        g = self.message.guild
-        if g:
-            return GuildWrapper(g, self.bot)
-        return None
+        return GuildWrapper.fromContext(self.message.guild, self.bot)
 
     def requireGuild(self) -> GuildWrapper:
         """
@@ -6,30 +6,81 @@ file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from __future__ import annotations
 
+import asyncio
+import heapq
+import itertools
 import json
 import os
+import sys
 import time
 import uuid
+from collections import Counter, OrderedDict
 from pathlib import Path
-from typing import Any, Iterable, Optional
+from typing import Any, Awaitable, Callable, Iterable, Optional
 
 
-# https://github.com/Rapptz/RoboDanny/blob/rewrite/cogs/utils/cache.py#L22-L43
-class ExpiringDict(dict):
-    """Subclassed dict for expiring cache"""
+_MISSING = object()
 
-    def __init__(self, items: Optional[dict] = None, maxAgeSeconds: Optional[int] = None) -> None:
+
+# Based on https://github.com/Rapptz/RoboDanny/blob/rewrite/cogs/utils/cache.py#L22-L43
+class ExpiringDict(OrderedDict):
+    """Subclassed dict for expiring cache
+
+    Deadlines are kept in a min-heap so expiring items doesn't require
+    walking the entire dict, and least recently used items are evicted once
+    `maxSize` is reached (0 means unbounded).
+
+    Items are stored with their insertion time, but only the values are
+    returned.
+    """
+
+    def __init__(
+        self,
+        items: Optional[dict] = None,
+        maxAgeSeconds: Optional[int] = None,
+        maxSize: int = 0,
+        onExpire: Callable[[Any, Any], None] | None = None,
+    ) -> None:
+        super().__init__()
         self.maxAgeSeconds: int = maxAgeSeconds or 3600  # (Default: 3600 seconds (1 hour))
+        self.maxSize: int = maxSize
+        # Called with the key and value of expired items
+        self.onExpire: Callable[[Any, Any], None] | None = onExpire
+        # (deadline, tiebreaker, key), may contain stale entries of
+        # overwritten/removed keys, they're skipped when popped
+        self._deadlines: list[tuple[float, int, Any]] = []
+        self._counter = itertools.count()
+        self.stats: Counter[str] = Counter()
+
         curTime: float = time.monotonic()
+        for k, v in (items or {}).items():
+            self._set(k, v, curTime)
 
-        items = items or {}
-        super().__init__({k: (v, curTime) for k, v in items.items()})
+    def _set(self, key: Any, value: Any, curTime: float) -> None:
+        super().__setitem__(key, (value, curTime))
+        self.move_to_end(key)
+        heapq.heappush(self._deadlines, (curTime + self.maxAgeSeconds, next(self._counter), key))
+
+        if self.maxSize and len(self) > self.maxSize:
+            self.popitem(last=False)
+            self.stats["evictions"] += 1
+
+        if len(self._deadlines) > 2 * len(self) + 64:
+            # Too many stale entries, rebuild the heap
+            self._deadlines = [(t + self.maxAgeSeconds, next(self._counter), k) for k, (_, t) in super().items()]
+            heapq.heapify(self._deadlines)
 
     def verifyCache(self) -> None:
         curTime: float = time.monotonic()
-        toRemove: list = [k for (k, (v, t)) in self.items() if curTime > (t + self.maxAgeSeconds)]
-        for k in toRemove:
-            del self[k]
+        deadlines = self._deadlines
+        while deadlines and curTime > deadlines[0][0]:
+            deadline, _, key = heapq.heappop(deadlines)
+            raw = super().get(key)
+            if raw is not None and raw[1] + self.maxAgeSeconds == deadline:
+                super().__delitem__(key)
+                self.stats["expired"] += 1
+                if self.onExpire is not None:
+                    self.onExpire(key, raw[0])
 
     def __contains__(self, key: Any) -> bool:
         self.verifyCache()
@@ -37,7 +88,14 @@ class ExpiringDict(dict):
 
     def __getitem__(self, key: Any) -> Any:
         self.verifyCache()
-        return super().__getitem__(key)[0]
+        try:
+            value = super().__getitem__(key)[0]
+        except KeyError:
+            self.stats["misses"] += 1
+            raise
+        self.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
 
     def get(self, key: Any, fallback: Any = None) -> Any:
         try:
@@ -51,7 +109,32 @@ class ExpiringDict(dict):
 
     def __setitem__(self, key: Any, value: Any) -> None:
         self.verifyCache()
-        return super().__setitem__(key, (value, time.monotonic()))
+        self._set(key, value, time.monotonic())
+
+    def update(self, *args, **kwargs) -> None:
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def items(self) -> list[tuple[Any, Any]]:  # type: ignore
+        self.verifyCache()
+        return [(k, v) for k, (v, _) in super().items()]
+
+    def values(self) -> list[Any]:  # type: ignore
+        self.verifyCache()
+        return [v for v, _ in super().values()]
+
+    def pop(self, key: Any, default: Any = _MISSING) -> Any:
+        self.verifyCache()
+        try:
+            return super().pop(key)[0]
+        except KeyError:
+            if default is _MISSING:
+                raise
+            return default
+
+    def popitem(self, last: bool = True) -> tuple[Any, Any]:
+        key, (value, _) = super().popitem(last=last)
+        return key, value
 
 
 class CacheError(Exception):
@@ -69,42 +152,141 @@ class CacheListFull(CacheError):
         super().__init__("Cache list is already full!")
 
 
+def _sizeOf(value: Any) -> int:
+    """Approximate memory used by a cached value"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sys.getsizeof(v) for v in value)
+    return size
+
+
+class _CacheEntry:
+    __slots__ = ("value", "size")
+
+    def __init__(self, value: Any, size: int = 0) -> None:
+        self.value: Any = value
+        # Only tracked when maxBytes is set
+        self.size: int = size
+
+
 class CacheProperty:
-    """Base Class for Cache Property"""
+    """Base Class for Cache Property
+
+    Items are keyed by snowflake (int) as is, no need to convert it to str.
+
+    Least recently used items are evicted once `maxEntries` or `maxBytes`
+    (approximated) is exceeded, 0 means unbounded. Evicted items can be
+    transparently reloaded with `fetch()` if `loader` is set, concurrent
+    misses of the same key will share a single load. `onDrop` is called with
+    the key everytime an item is evicted, expired or cleared.
+    """
 
     # issubclass doesn't work properly, this is the best workaround i could think of
     isCacheProperty: bool = True
 
-    def __init__(self, unique: bool = False, ttl: int = 0) -> None:
+    def __init__(
+        self,
+        unique: bool = False,
+        ttl: int = 0,
+        maxEntries: int = 0,
+        maxBytes: int = 0,
+        loader: Callable[[Any], Awaitable[Any]] | None = None,
+        onDrop: Callable[[Any], Any] | None = None,
+    ) -> None:
         self.unique: bool = unique  # Only unique value can be added/appended
-        self._items: dict[str, Any] = {} if ttl < 1 else ExpiringDict(maxAgeSeconds=ttl)
+        self.maxEntries: int = maxEntries
+        self.maxBytes: int = maxBytes
+        # Used to (re)load an item (usually from database) on cache miss
+        self.loader: Callable[[Any], Awaitable[Any]] | None = loader
+        # Used to drop things derived from an item (e.g. prefix matcher)
+        self.onDrop: Callable[[Any], Any] | None = onDrop
+        self._items: OrderedDict[Any, _CacheEntry] = (
+            OrderedDict() if ttl < 1 else ExpiringDict(maxAgeSeconds=ttl, onExpire=self._expired)
+        )
+        self._bytes: int = 0
+        # Loads that's currently in-flight, shared between concurrent misses
+        self._loading: dict[Any, asyncio.Future] = {}
+        # Bumped everytime an item is modified or dropped while it's being
+        # loaded, so outdated load won't be cached
+        self._generations: dict[Any, int] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
 
     def __repr__(self) -> str:
-        return f"<CacheProperty: {self._items}>"
+        return f"<CacheProperty: {self.items}>"
 
     @property
     def items(self) -> dict:
-        return self._items
-
-    def set(self, _key: Any, value: Any) -> CacheProperty:
+        return {k: e.value for k, e in self._items.items()}
+
+    def _bump(self, key: Any) -> None:
+        if key in self._loading:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            # Newer misses shouldn't wait for the outdated load
+            del self._loading[key]
+
+    def _store(self, key: Any, value: Any) -> None:
+        """Should be called everytime an item is added or modified"""
+        self._bump(key)
+        items = self._items
+        entry = items.get(key)
+        if entry is None:
+            entry = items[key] = _CacheEntry(value)
+        else:
+            entry.value = value
+            items.move_to_end(key)
+
+        if self.maxBytes:
+            size = _sizeOf(value)
+            self._bytes += size - entry.size
+            entry.size = size
+
+        while (self.maxEntries and len(items) > self.maxEntries) or (self.maxBytes and self._bytes > self.maxBytes):
+            oldest = next(iter(items))
+            if oldest == key:
+                # Always keep the newest item, even if it's over the budget
+                break
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _expired(self, key: Any, entry: _CacheEntry) -> None:
+        self._bytes -= entry.size
+        if self.onDrop is not None:
+            self.onDrop(key)
+
+    def _drop(self, key: Any) -> None:
+        self._bump(key)
+        entry = self._items.pop(key, None)
+        if entry is not None:
+            self._expired(key, entry)
+
+    def set(self, key: Any, value: Any) -> CacheProperty:
         # Will bypass unique check
-        key: str = str(_key)
-
-        self._items.update({key: value})
+        self._store(key, value)
         return self
 
-    def add(self, _key: Any, value: Any) -> CacheProperty:
-        key: str = str(_key)
-
+    def add(self, key: Any, value: Any) -> CacheProperty:
         if self.unique and key in self._items:
             raise CacheUniqueViolation
 
         return self.set(key, value)
 
-    def __getitem__(self, _key: Any) -> Any:
-        key = str(_key)
+    def __contains__(self, key: Any) -> bool:
+        return key in self._items
 
-        return self._items[key]
+    def __getitem__(self, key: Any) -> Any:
+        try:
+            entry = self._items[key]
+        except KeyError:
+            self.misses += 1
+            raise
+
+        self.hits += 1
+        self._items.move_to_end(key)
+        return entry.value
 
     def get(self, key: Any, fallback: Any = None) -> Any:
         try:
@@ -112,52 +294,87 @@ class CacheProperty:
         except KeyError:
             return fallback
 
-    def clear(self, key: Any) -> None:
+    async def fetch(self, key: Any) -> Any:
+        """|coro|
+
+        Get an item, (re)load it with `loader` on cache miss
+        """
         try:
-            del self._items[str(key)]
+            return self[key]
         except KeyError:
-            # Not exists
-            pass
+            if self.loader is None:
+                raise
 
+        future = self._loading.get(key)
+        if future is None:
+            future = self._loading[key] = asyncio.ensure_future(self._load(key, self._generations.get(key, 0)))
+        # Shielded, so cancelled waiter won't cancel the load for the others
+        return await asyncio.shield(future)
 
-class CacheDictProperty(CacheProperty):
-    """Cache Dict Property"""
+    async def _load(self, key: Any, generation: int) -> Any:
+        task = asyncio.current_task()
+        try:
+            value = await self.loader(key)  # type: ignore
+        finally:
+            # Item is modified or dropped while loading, value might be outdated
+            stale = self._generations.get(key, 0) != generation
+            if self._loading.get(key) is task:
+                del self._loading[key]
+            if key not in self._loading:
+                self._generations.pop(key, None)
+
+        if stale:
+            # Get the newer one instead
+            return await self.fetch(key)
+
+        self.set(key, value)
+        return self._items[key].value
 
-    def __init__(
-        self,
-        unique: bool = False,
-        ttl: int = 0,
-    ) -> None:
-        super().__init__(unique=unique, ttl=ttl)
-        self._items: dict[str, Any] = {}
+    def clear(self, key: Any) -> None:
+        # Not exists is fine
+        self._drop(key)
 
-    def set(self, _key: Any, value: dict[str, Any]) -> CacheDictProperty:
-        key: str = str(_key)
+    def stats(self) -> dict[str, Any]:
+        hits, misses = self.hits, self.misses
+        return {
+            "size": len(self._items),
+            "bytes": self._bytes if self.maxBytes else sum(_sizeOf(e.value) for e in self._items.values()),
+            "hits": hits,
+            "misses": misses,
+            "hitRate": hits / (hits + misses) if hits or misses else 0.0,
+            "evictions": self.evictions,
+        }
 
+
+class CacheDictProperty(CacheProperty):
+    """Cache Dict Property"""
+
+    def set(self, key: Any, value: dict[str, Any]) -> CacheDictProperty:
         if not isinstance(value, dict):
             raise RuntimeError("Only dict value is allowed!")
-        try:
-            self._items[key].update(value)
-        except KeyError:
-            super().set(key, value)
-        return self
 
-    # def add(self, key: str, value: Dict[str, Any]) -> CacheDictProperty:
-    #     key = str(key)
-
-    #     return self.set(key, value)
+        entry = self._items.get(key)
+        if entry is not None:
+            entry.value.update(value)
+            value = entry.value
+        self._store(key, value)
+        return self
 
     add = set
 
 
 class CacheListProperty(CacheProperty):
-    """Cache List Property with Optional "unique" toggle"""
+    """Cache List Property with Optional "unique" toggle
+
+    Values are stored as tuple, modifying it will replace the tuple.
+    """
 
     def __init__(
         self,
         unique: bool = False,
         blacklist: Iterable = tuple(),
         limit: int = 0,
+        **kwargs,
     ) -> None:
         """
         Usage
@@ -174,40 +391,42 @@ class CacheListProperty(CacheProperty):
         __main__.CacheUniqueViolation: Unique Value Violation
         ...
         """
-        super().__init__(unique=unique)
-        self.blacklist: Iterable = list(blacklist)
+        super().__init__(unique=unique, **kwargs)
+        self.blacklist: frozenset = frozenset(blacklist)
         self.limit: int = limit
 
-    def extend(self, _key: Any, values: Iterable) -> CacheListProperty:
-        key: str = str(_key)
-        items = self._items.get(key, [])
+    def _current(self, key: Any) -> tuple:
+        entry = self._items.get(key)
+        return () if entry is None else entry.value
+
+    def set(self, key: Any, value: Iterable) -> CacheListProperty:
+        # Will bypass unique check
+        self._store(key, tuple(value))
+        return self
+
+    def extend(self, key: Any, values: Iterable) -> CacheListProperty:
+        items = self._current(key)
         values = set(values)  # Remove duplicates
 
         if not values:
-            self.set(key, [])
+            self.set(key, items)
             raise ValueError("value can't be empty")
 
         if self.limit and (len(items) + len(values)) > self.limit:
             raise CacheListFull
 
         if self.unique:
-            values = [v for v in values if v not in items or v not in self.blacklist]
+            values = [v for v in values if v not in items and v not in self.blacklist]
             if not values:
                 raise CacheUniqueViolation
 
-        try:
-            self._items[key].extend(values)
-        except KeyError:
-            self.set(key, list(values))
-
-        return self
+        return self.set(key, items + tuple(values))
 
-    def add(self, _key: Any, value: Any) -> CacheListProperty:
-        key: str = str(_key)
-        items = self._items.get(key, [])
+    def add(self, key: Any, value: Any) -> CacheListProperty:
+        items = self._current(key)
 
         if not isinstance(value, int) and not value:
-            self._items[key] = []
+            self.set(key, ())
             raise ValueError("value can't be empty")
 
         if self.limit and (len(items) + 1) > self.limit:
@@ -219,19 +438,13 @@ class CacheListProperty(CacheProperty):
         if value in self.blacklist:
             raise CacheError(f"'{value}' is blacklisted")
 
-        try:
-            self._items[key].append(value)
-        except KeyError:
-            self.set(key, [value])
-
-        return self
+        return self.set(key, items + (value,))
 
     # Alias add as append
     append = add
 
-    def remove(self, _key: Any, value: Any) -> CacheListProperty:
-        key: str = str(_key)
-        items = self._items.get(key, [])
+    def remove(self, key: Any, value: Any) -> CacheListProperty:
+        items = self._current(key)
 
         if not value:
             raise ValueError("value can't be empty!")
@@ -240,12 +453,63 @@ class CacheListProperty(CacheProperty):
             raise IndexError("List is empty!")
 
         try:
-            self._items[key].remove(value)
+            index = items.index(value)
         except ValueError:
             raise ValueError(f"'{value}' not in the list") from None
 
+        return self.set(key, items[:index] + items[index + 1 :])
+
+
+class CacheSetProperty(CacheProperty):
+    """Cache Set Property, always unique
+
+    Values are stored as frozenset for constant-time membership test,
+    modifying it will replace the frozenset.
+    """
+
+    def _current(self, key: Any) -> frozenset:
+        entry = self._items.get(key)
+        return frozenset() if entry is None else entry.value
+
+    def set(self, key: Any, value: Iterable) -> CacheSetProperty:
+        self._store(key, frozenset(value))
         return self
 
+    def extend(self, key: Any, values: Iterable) -> CacheSetProperty:
+        items = self._current(key)
+        values = frozenset(values)
+
+        if not values:
+            self.set(key, items)
+            raise ValueError("value can't be empty")
+
+        if not values - items:
+            raise CacheUniqueViolation
+
+        return self.set(key, items | values)
+
+    def add(self, key: Any, value: Any) -> CacheSetProperty:
+        items = self._current(key)
+
+        if value in items:
+            raise CacheUniqueViolation
+
+        return self.set(key, items | {value})
+
+    # Alias add as append
+    append = add
+
+    def remove(self, key: Any, value: Any) -> CacheSetProperty:
+        items = self._current(key)
+
+        if not items:
+            raise IndexError("Set is empty!")
+
+        if value not in items:
+            raise ValueError(f"'{value}' not in the set")
+
+        return self.set(key, items - {value})
+
 
 class Cache:
     """Cache manager"""
@@ -270,6 +534,10 @@ class Cache:
         setattr(self, name, cls(**kwargs))
         return self
 
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Size, hit rate and evictions of each properties"""
+        return {name: getattr(self, name).stats() for name in self._property}
+
 
 class JSON(dict):
     __slots__ = ("filename", "data")
@@ -302,34 +570,96 @@ class JSON(dict):
 
 
 class Blacklist(JSON):
-    def __init__(self, filename: str = "blacklist.json"):
+    """Blacklist backed by sets for constant-time lookups
+
+    Changes are appended to a change log (`<filename>.log`) instead of
+    rewriting the whole file, the log will be compacted into the JSON file
+    on load and every `compactAfter` changes.
+    """
+
+    def __init__(self, filename: str = "blacklist.json", *, compactAfter: int = 500):
         super().__init__(filename)
+        self.logFilename: Path = self.filename.with_name(f"{self.filename.name}.log")
+        self.compactAfter: int = compactAfter
+        self._logSize: int = 0
+
+        self.update({k: set(v) for k, v in self.items()})
+        self.setdefault("guilds", set())
+        self.setdefault("users", set())
+
+        if self._replay():
+            self.compact()
 
     @property
-    def guilds(self):
-        return self.get("guilds", [])
+    def guilds(self) -> set[int]:
+        return self["guilds"]
 
     @property
-    def users(self):
-        return self.get("users", [])
+    def users(self) -> set[int]:
+        return self["users"]
 
     def __repl__(self):
         return f"<Blacklist: guilds={self.guilds} users={self.users}>"
 
-    def append(self, key: Any, value: Any, **kwargs) -> Any:
-        val: list = self.get(key, [])
-        val.append(value)
-        self.update({key: val})
+    def _replay(self) -> int:
+        """Apply changes from change log, returns how many changes applied"""
+        try:
+            f = open(self.logFilename, "r")
+        except FileNotFoundError:
+            return 0
+
+        applied = 0
+        with f:
+            for line in f:
+                try:
+                    op, key, value = json.loads(line)
+                except ValueError:
+                    # Partially written change, most likely caused by crash
+                    continue
+
+                values: set = self.setdefault(key, set())
+                if op == "+":
+                    values.add(value)
+                else:
+                    values.discard(value)
+                applied += 1
+        return applied
+
+    def _log(self, op: str, key: Any, value: Any, **kwargs) -> None:
+        with open(self.logFilename, "a") as f:
+            f.write(json.dumps([op, key, value]) + "\n")
+
+        self._logSize += 1
+        if self._logSize >= self.compactAfter:
+            self.compact(**kwargs)
+
+    def dump(self, indent: int = 4, **kwargs):
+        # Sets are not JSON serializable
+        kwargs.setdefault("default", sorted)
+        return super().dump(indent, **kwargs)
 
+    def compact(self, **kwargs) -> None:
+        """Write the whole blacklist to the JSON file and clear the change log"""
         self.dump(**kwargs)
+        try:
+            os.remove(self.logFilename)
+        except FileNotFoundError:
+            pass
+        self._logSize = 0
+
+    def append(self, key: Any, value: Any, **kwargs) -> Any:
+        self.setdefault(key, set()).add(value)
+
+        self._log("+", key, value, **kwargs)
         return value
 
     def remove(self, key: Any, value: Any, **kwargs) -> Any:
-        val: list = self.get(key, [])
-        val.remove(value)
-        self.update({key: val})
+        try:
+            self.get(key, set()).remove(value)
+        except KeyError:
+            raise ValueError(f"'{value}' not in the list") from None
 
-        self.dump(**kwargs)
+        self._log("-", key, value, **kwargs)
         return value
 
 
@@ -32,6 +32,9 @@ from tortoise.models import Model
 
 - Timer's JSON column now uses JSONField from Tortoise,
   which translated to: MySQL = JSON, PostgreSQL = JsonB, SQLite = TEXT
+
+- Indexes are declared in each model's Meta and should match the columns
+  hot lookups filter on, aerich will generate the migration on startup
 """
 
 
@@ -47,6 +50,8 @@ class NewIntField(fields.IntField):
 
 class Guilds(Model):
     id = fields.BigIntField(pk=True, generated=False)
+    # Last case number used by the guild's caselog
+    caseCount = fields.BigIntField(pk=False, generated=False, default=0)
 
 
 class ContainsGuildId:
@@ -62,6 +67,10 @@ class Timer(Model):
     created = fields.DatetimeField()
     owner = fields.BigIntField(pk=False, generated=False)
 
+    class Meta:
+        # event is TEXT, which MySQL can't index without prefix length
+        indexes = (("expires",), ("owner",))
+
 
 class Commands(Model):
     id = NewBigIntField(pk=True)
@@ -86,12 +95,18 @@ class CommandsLookup(ContainsGuildId, Model):
 
     class Meta:
         table = "commandsLookup"
+        # name is TEXT, which MySQL can't index without prefix length
+        indexes = (("guild_id",), ("cmd_id",))
 
 
 class Disabled(ContainsGuildId, Model):
     id = NewIntField(pk=True)
     command = fields.TextField()
 
+    class Meta:
+        # command is TEXT, which MySQL can't index without prefix length
+        indexes = (("guild_id",),)
+
 
 class Prefixes(ContainsGuildId, Model):
     id = NewIntField(pk=True)
@@ -99,6 +114,8 @@ class Prefixes(ContainsGuildId, Model):
 
     class Meta:
         unique_together = (("prefix", "guild_id"),)
+        # unique_together's index can't be used to filter by guild_id alone
+        indexes = (("guild_id",),)
 
 
 class GuildConfigs(ContainsGuildId, Model):
@@ -111,6 +128,8 @@ class GuildConfigs(ContainsGuildId, Model):
 
     class Meta:
         table = "guildConfigs"
+        # One row per guild, required for upsert
+        unique_together = (("guild",),)
 
 
 class GuildChannels(ContainsGuildId, Model):
@@ -123,6 +142,8 @@ class GuildChannels(ContainsGuildId, Model):
 
     class Meta:
         table = "guildChannels"
+        # One row per guild, required for upsert
+        unique_together = (("guild",),)
 
 
 class GuildRoles(ContainsGuildId, Model):
@@ -133,6 +154,8 @@ class GuildRoles(ContainsGuildId, Model):
 
     class Meta:
         table = "guildRoles"
+        # One row per guild, required for upsert
+        unique_together = (("guild",),)
 
 
 class GuildMutes(ContainsGuildId, Model):
@@ -141,6 +164,7 @@ class GuildMutes(ContainsGuildId, Model):
 
     class Meta:
         table = "guildMutes"
+        indexes = (("guild_id", "mutedId"),)
 
 
 class CaseLog(ContainsGuildId, Model):
@@ -154,9 +178,20 @@ class CaseLog(ContainsGuildId, Model):
 
     class Meta:
         table = "caseLog"
+        indexes = (("guild_id", "caseId"), ("guild_id", "modId"))
 
 
 class Users(Model):
     id = fields.BigIntField(pk=True, generated=False)
     locale = fields.TextField(null=True)
     timeZone = fields.TextField(null=True)
+
+
+class SchemaFingerprint(Model):
+    # Fingerprint of the models used in the last migration, only has 1 row
+    id = fields.IntField(pk=True, generated=False)
+    fingerprint = fields.TextField()
+    updatedAt = fields.DatetimeField()
+
+    class Meta:
+        table = "schemaFingerprint"
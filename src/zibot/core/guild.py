@@ -37,7 +37,13 @@ class CCMode(Enum):
 
 
 class GuildWrapper:
-    """Wrapper for Guild class to get config from database easier"""
+    """Wrapper for Guild class to get config from database easier
+
+    Use `fromContext` to get one, wrappers are reused for as long as the bot
+    is in the guild.
+    """
+
+    __slots__ = ("guild", "bot", "prefix")
 
     def __init__(self, guild: discord.Guild, bot: ziBot):
         self.guild = guild
@@ -46,18 +52,24 @@ class GuildWrapper:
 
     @classmethod
     def fromContext(cls, guild: discord.Guild | None, bot: ziBot) -> GuildWrapper | None:
-        if guild:
-            return cls(guild, bot)
-        return None
+        if not guild:
+            return None
+
+        wrapper = bot.guildWrappers.get(guild.id)
+        # Guild object might be replaced by discord.py (e.g. after outage)
+        if wrapper is None or wrapper.guild is not guild:
+            wrapper = bot.guildWrappers[guild.id] = cls(guild, bot)
+        return wrapper
 
     def __str__(self) -> str:
         return str(self.guild)
 
     def __getattr__(self, name: str):
-        try:
-            return self.guild.__getattribute__(name)
-        except:
-            return self.__getattribute__(name)
+        # Only called when the attribute is not found in the wrapper
+        if name in self.__slots__:
+            # Not initialized yet, avoid infinite recursion
+            raise AttributeError(name)
+        return getattr(self.guild, name)
 
     async def getPrefixes(self):
         return await self.prefix.get()
@@ -76,7 +88,7 @@ class GuildWrapper:
         return await self.bot.getGuildConfig(self.id, configType)
 
     async def getCCMode(self) -> CCMode:
-        return CCMode(await self.bot.getGuildConfig(self.id, "ccMode") or 0)
+        return CCMode((await self.bot.getGuildSettings(self.id)).ccMode)
 
     async def hasPermissions(self, member: discord.Member, bot: ziBot, **perms):
         return await checks.hasGuildPermissionsWithoutContext(**perms)(member, bot)
@@ -0,0 +1,130 @@
+"""
+This Source Code Form is subject to the terms of the Mozilla Public
+License, v. 2.0. If a copy of the MPL was not distributed with this
+file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import functools
+import logging
+import time
+from typing import Any
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+
+__all__ = ("PoolMonitor",)
+
+
+# Upper bound (in milliseconds) of each wait time histogram's bucket, the
+# last bucket is for anything slower
+WAIT_BUCKETS: tuple[float, ...] = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class _MonitoredPool:
+    """Proxy for asyncpg/aiomysql pool, Tortoise only uses acquire and release"""
+
+    __slots__ = ("pool", "monitor")
+
+    def __init__(self, pool: Any, monitor: PoolMonitor) -> None:
+        self.pool = pool
+        self.monitor = monitor
+
+    def __getattr__(self, name: str) -> Any:
+        if name in self.__slots__:
+            raise AttributeError(name)
+        return getattr(self.pool, name)
+
+    async def acquire(self) -> Any:
+        return await self.monitor.acquire(self.pool)
+
+    def release(self, connection: Any) -> Any:
+        self.monitor.inUse -= 1
+        return self.pool.release(connection)
+
+
+class PoolMonitor:
+    """Keep track of connection pool usage and enforce acquire timeout
+
+    Does nothing on backends without connection pool (SQLite).
+    """
+
+    __slots__ = ("acquireTimeout", "logger", "client", "inUse", "waiting", "acquired", "timeouts", "waits")
+
+    def __init__(self, acquireTimeout: float | None = None) -> None:
+        # In seconds, None means wait forever
+        self.acquireTimeout: float | None = acquireTimeout
+        self.logger: logging.Logger = logging.getLogger("discord")
+        self.client: BaseDBAsyncClient | None = None
+        self.inUse: int = 0
+        self.waiting: int = 0
+        self.acquired: int = 0
+        self.timeouts: int = 0
+        self.waits: list[int] = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def install(self, client: BaseDBAsyncClient) -> None:
+        if not hasattr(client, "_pool"):
+            return
+
+        self.client = client
+        if client._pool is not None:  # type: ignore
+            client._pool = _MonitoredPool(client._pool, self)  # type: ignore
+
+        # Pool is (re)created lazily
+        createConnection = client.create_connection
+
+        @functools.wraps(createConnection)
+        async def wrapped(*args, **kwargs) -> None:
+            await createConnection(*args, **kwargs)
+            pool = client._pool  # type: ignore
+            if pool is not None and not isinstance(pool, _MonitoredPool):
+                client._pool = _MonitoredPool(pool, self)  # type: ignore
+
+        client.create_connection = wrapped  # type: ignore
+
+    async def acquire(self, pool: Any) -> Any:
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            connection = await asyncio.wait_for(pool.acquire(), self.acquireTimeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.logger.warning(f"Timed out waiting for database connection ({self.waiting - 1} others waiting)")
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.waits[bisect.bisect_left(WAIT_BUCKETS, (time.perf_counter() - start) * 1000)] += 1
+        self.acquired += 1
+        self.inUse += 1
+        return connection
+
+    def stats(self) -> dict[str, Any]:
+        client = self.client
+        pool = getattr(client, "_pool", None)
+        if pool is None:
+            return {}
+
+        pool = pool.pool
+        if hasattr(pool, "get_size"):
+            # asyncpg
+            size, idle = pool.get_size(), pool.get_idle_size()
+        else:
+            # aiomysql
+            size, idle = pool.size, pool.freesize
+
+        labels = [f"<={i}ms" for i in WAIT_BUCKETS] + [f">{WAIT_BUCKETS[-1]}ms"]
+        return {
+            "minSize": client.pool_minsize,  # type: ignore
+            "maxSize": client.pool_maxsize,  # type: ignore
+            "size": size,
+            "idle": idle,
+            "inUse": self.inUse,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "waitHistogram": dict(zip(labels, self.waits)),
+        }
@@ -6,7 +6,8 @@ file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import re
+from typing import TYPE_CHECKING, Iterable
 
 import discord
 from discord.ext import commands
@@ -21,7 +22,32 @@ if TYPE_CHECKING:
     from .bot import ziBot
 
 
-__all__ = ("Prefix",)
+__all__ = ("Prefix", "PrefixMatcher", "loadPrefixes")
+
+
+async def loadPrefixes(guildId: int) -> list[str]:
+    return [p.prefix for p in await db.Prefixes.filter(guild_id=guildId)]
+
+
+class PrefixMatcher:
+    """Precompiled prefix matcher, prefixes (and mentions) are tried longest-first"""
+
+    __slots__ = ("prefixes", "_pattern")
+
+    def __init__(self, prefixes: Iterable[str], userId: int) -> None:
+        # Mention forms are the same as commands.when_mentioned
+        self.prefixes: list[str] = [f"<@{userId}> ", f"<@!{userId}> "] + sorted(set(prefixes), key=len, reverse=True)
+        self._pattern: re.Pattern = re.compile("|".join(re.escape(p) for p in self.prefixes))
+
+    def __repr__(self) -> str:
+        return f"<PrefixMatcher: {self.prefixes}>"
+
+    def match(self, content: str) -> str | None:
+        """Returns prefix used by the content, or None if there's none"""
+        matched = self._pattern.match(content)
+        if matched:
+            return matched.group()
+        return None
 
 
 class Prefix:
@@ -34,17 +60,12 @@ class Prefix:
             return await db.Prefixes.filter(guild_id=self.owner.id)
         return []
 
-    async def get(self) -> list[str]:
-        if self.bot.cache.prefixes.get(self.owner.id) is None:  # type: ignore
-            # Only executed when there's no cache for guild's prefix
-            dbPrefixes = await self.fetch()
+    async def get(self) -> tuple[str, ...]:
+        if not isinstance(self.owner, discord.Guild):
+            return ()
 
-            try:
-                self.bot.cache.prefixes.extend(self.owner.id, [p.prefix for p in dbPrefixes])  # type: ignore
-            except ValueError:
-                return []
-
-        return self.bot.cache.prefixes[self.owner.id]  # type: ignore
+        # Will be loaded from database if it's not cached
+        return await self.bot.cache.prefixes.fetch(self.owner.id)  # type: ignore
 
     async def getFormatted(self) -> str:
         _prefixes = await self.get()
@@ -65,6 +86,9 @@ class Prefix:
 
     async def add(self, prefix: str) -> str:
         prefixes = await self.fetch()
+        # Make sure guild's prefixes is cached (could be evicted), otherwise
+        # the new prefix will be the only cached prefix
+        await self.get()
 
         try:
             if prefixes and (len(prefixes) + 1) > self.bot.cache.prefixes.limit:  # type: ignore
@@ -72,6 +96,8 @@ class Prefix:
 
             await db.Prefixes.create(prefix=prefix, guild_id=self.owner.id)
             self.bot.cache.prefixes.add(self.owner.id, prefix)  # type: ignore
+            self.bot.prefixMatchers.pop(self.owner.id, None)
+            await self.bot.refreshGuildSettings(self.owner.id)
         except (CacheUniqueViolation, IntegrityError) as exc:
             if exc is IntegrityError:
                 self.bot.cache.prefixes.remove(self.owner.id, prefix)  # type: ignore
@@ -86,12 +112,17 @@ class Prefix:
         return prefix
 
     async def remove(self, prefix: str) -> str:
+        # Make sure guild's prefixes is cached (could be evicted)
+        await self.get()
+
         try:
             res = [await i.delete() for i in await db.Prefixes.filter(prefix=prefix, guild_id=self.owner.id)]
             if not res:
                 raise IndexError
 
             self.bot.cache.prefixes.remove(self.owner.id, prefix)  # type: ignore
+            self.bot.prefixMatchers.pop(self.owner.id, None)
+            await self.bot.refreshGuildSettings(self.owner.id)
         except IndexError:
             raise commands.BadArgument("Prefix `{}` is not exists".format(self.cleanify(prefix)))
 
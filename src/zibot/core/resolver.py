@@ -0,0 +1,146 @@
+"""
+This Source Code Form is subject to the terms of the Mozilla Public
+License, v. 2.0. If a copy of the MPL was not distributed with this
+file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import TYPE_CHECKING, Iterable
+
+import discord
+from discord.ext.commands.view import StringView
+
+from .context import Context
+
+
+if TYPE_CHECKING:
+    from .bot import ziBot
+
+
+__all__ = ("PRIORITY_MARKERS", "MessageFilter", "ParsedCommand", "resolveCommand")
+
+
+# Markers that gives custom command higher priority than built-in command,
+# `./` is for unix-style of launching custom scripts
+# TODO: Add ability add custom priority prefix
+PRIORITY_MARKERS: tuple[str, ...] = (">", "!", "./")
+
+
+class MessageFilter:
+    """Cheap pre-filter to reject messages that can't be processed by the bot
+
+    Never awaits anything, when it can't prove a message is useless the
+    message is accepted and processed normally.
+    """
+
+    __slots__ = ("bot", "emojiUsers", "mentionPattern", "stats")
+
+    def __init__(self, bot: ziBot, *, emojiUsers: Iterable[int] = tuple()) -> None:
+        self.bot: ziBot = bot
+        # Users that are allowed to use the "No Nitro" emoji
+        self.emojiUsers: frozenset[int] = frozenset(emojiUsers)
+        self.mentionPattern: re.Pattern | None = None
+        # Rejected messages of each stage, and "accepted" for messages that
+        # passed every stage
+        self.stats: Counter[str] = Counter()
+
+    def compile(self, userId: int) -> None:
+        """Should only be called once the bot's user is available"""
+        self.mentionPattern = re.compile(f"<@!?{userId}>")
+
+    def isMentionOnly(self, content: str) -> bool:
+        return self.mentionPattern is not None and self.mentionPattern.fullmatch(content) is not None
+
+    def accepts(self, message: discord.Message) -> bool:
+        bot = self.bot
+        author = message.author
+        guild = message.guild
+
+        if (
+            author.bot or author.id in bot.blacklist.users or (guild and guild.id in bot.blacklist.guilds)
+        ) and author.id not in bot.ownerIds:
+            # dont accept commands from bot
+            self.stats["ignored"] += 1
+            return False
+
+        content = message.content
+        if not content:
+            self.stats["empty"] += 1
+            return False
+
+        matcher = bot.prefixMatchers.get(guild.id if guild else 0)
+        if (
+            self.mentionPattern is not None
+            and matcher is not None
+            and not matcher.match(content)
+            and not self.mentionPattern.fullmatch(content)
+            and (author.id not in self.emojiUsers or ";" not in content)
+        ):
+            self.stats["nonCommand"] += 1
+            return False
+
+        self.stats["accepted"] += 1
+        return True
+
+
+class ParsedCommand:
+    """Result of parsing a message's prefix, priority marker, invoked name and argument"""
+
+    __slots__ = ("prefix", "priority", "invokedWith", "argument")
+
+    def __init__(self, prefix: str, priority: int, invokedWith: str, argument: str) -> None:
+        self.prefix: str = prefix
+        # 0 = Built-In, 1 = Custom
+        self.priority: int = priority
+        self.invokedWith: str = invokedWith
+        self.argument: str = argument
+
+    def __repr__(self) -> str:
+        return "<ParsedCommand: prefix={0.prefix!r} priority={0.priority} invokedWith={0.invokedWith!r}>".format(self)
+
+    @property
+    def invokedName(self) -> str:
+        """Name used to look up custom commands"""
+        return self.invokedWith.lower()
+
+
+async def resolveCommand(bot: ziBot, message: discord.Message, *, cls=Context) -> tuple[Context, ParsedCommand | None]:
+    """|coro|
+
+    Parse message's content exactly once and build the invocation context from it.
+
+    Similar to `commands.Bot.get_context` but also handles priority marker,
+    returns `None` as ParsedCommand if the message is not a command candidate.
+    """
+    view = StringView(message.content)
+    ctx = cls(prefix=None, view=view, bot=bot, message=message)
+
+    if message.author.id == bot.requireUser().id:
+        return ctx, None
+
+    matcher = await bot.getPrefixMatcher(message.guild)
+    invokedPrefix = matcher.match(message.content)
+    if not invokedPrefix:
+        return ctx, None
+    view.skip_string(invokedPrefix)
+
+    priority = 0
+    if any(view.skip_string(marker) for marker in PRIORITY_MARKERS):
+        priority = 1
+
+    if bot.strip_after_prefix:
+        view.skip_ws()
+
+    invoker = view.get_word()
+    argument = view.buffer[view.index :]
+    if argument[:1].isspace():
+        # Only strip the separator, the rest belongs to the argument
+        argument = argument[1:]
+
+    ctx.invoked_with = invoker
+    ctx.prefix = invokedPrefix
+    ctx.command = bot.all_commands.get(invoker)
+    return ctx, ParsedCommand(invokedPrefix, priority, invoker, argument)
@@ -0,0 +1,117 @@
+"""
+This Source Code Form is subject to the terms of the Mozilla Public
+License, v. 2.0. If a copy of the MPL was not distributed with this
+file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+
+from aerich import Command as AerichCommand
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import OperationalError
+
+from ..utils import utcnow
+from . import db
+from .config import Config
+from .settings import GuildConfigStore
+
+
+__all__ = ("schemaFingerprint", "isSchemaChanged", "collapseGuildConfigs", "applyMigrations")
+
+
+def schemaFingerprint() -> str:
+    """Hash of the models' definition, Tortoise has to be initialized"""
+    models = [m for m in Tortoise.apps["models"].values() if m.__module__ == db.__name__]
+    described = Tortoise.describe_models(models, serializable=True)
+    return hashlib.sha256(json.dumps(described, sort_keys=True).encode()).hexdigest()
+
+
+async def isSchemaChanged() -> bool:
+    """|coro|
+
+    Compare current models with the ones used in the last migration
+    """
+    try:
+        stored = await db.SchemaFingerprint.filter(id=1).values_list("fingerprint", flat=True)
+    except OperationalError:
+        # Table doesn't exist yet
+        return True
+    return not stored or stored[0] != schemaFingerprint()
+
+
+async def collapseGuildConfigs(connection: BaseDBAsyncClient | None = None) -> None:
+    """|coro|
+
+    Merge duplicate guild config rows, has to be done before the unique
+    constraint on guild_id is applied
+    """
+    logger = logging.getLogger("discord")
+    for table in (db.GuildConfigs, db.GuildChannels, db.GuildRoles):
+        try:
+            collapsed = await GuildConfigStore.collapseDuplicates(table, connection)
+        except OperationalError as err:
+            # Table doesn't exist yet
+            logger.warning(f"Unable to collapse duplicate {table.__name__} rows: {err}")
+            continue
+        if collapsed:
+            logger.warning(f"Collapsed duplicate {table.__name__} rows of {collapsed} guilds")
+
+
+def cleanMigrationDir(directory: Path) -> None:
+    for filename in os.listdir(directory):
+        filePath = directory / filename
+        try:
+            if os.path.isfile(filePath) or os.path.islink(filePath):
+                os.unlink(filePath)
+            elif os.path.isdir(filePath):
+                shutil.rmtree(filePath)
+        except Exception as err:
+            print(f"Failed to delete {filePath}. Reason: {err}")
+
+
+async def applyMigrations(config: Config) -> None:
+    """|coro|
+
+    Generate and apply migrations using aerich, then save the schema
+    fingerprint so the next boot can skip it
+    """
+    logger = logging.getLogger("discord")
+    migrationDir = config.migrationDir
+
+    aerichCmd = AerichCommand(
+        tortoise_config=config.tortoiseConfig,
+        location=str(migrationDir),
+    )
+
+    if migrationDir.exists():
+        await aerichCmd.init()
+        await collapseGuildConfigs()
+
+        try:
+            update = await aerichCmd.migrate()
+
+            if update:
+                upgrades = await aerichCmd.upgrade()
+                if len(upgrades) > 0:
+                    logger.warning(f"DB Upgrades done ({len(upgrades)}): {', '.join(upgrades)}")
+
+        except AttributeError:
+            logger.warning("Unable to retrieve model history from the database! " "Creating model history from scratch...")
+
+            cleanMigrationDir(migrationDir)
+
+            await aerichCmd.init_db(True)
+    else:
+        await aerichCmd.init_db(True)
+
+    await Tortoise.generate_schemas(safe=True)
+
+    await db.SchemaFingerprint.update_or_create(id=1, defaults={"fingerprint": schemaFingerprint(), "updatedAt": utcnow()})
@@ -0,0 +1,186 @@
+"""
+This Source Code Form is subject to the terms of the Mozilla Public
+License, v. 2.0. If a copy of the MPL was not distributed with this
+file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.functions import Count
+from tortoise.models import Model
+
+
+__all__ = ("GuildConfigStore", "GuildSettings")
+
+
+class GuildSettings:
+    """Immutable snapshot of a guild's configs, channels, roles and prefixes
+
+    A new snapshot (with higher version) is built and swapped in everytime
+    the guild's settings changed, so an event handler only need to get one
+    snapshot and it won't change halfway through.
+    """
+
+    __slots__ = ("guildId", "version", "prefixes", "ccMode", "_values")
+
+    def __init__(
+        self,
+        guildId: int,
+        version: int,
+        *,
+        prefixes: tuple[str, ...] = tuple(),
+        configs: Mapping[str, Any] | None = None,
+        channels: Mapping[str, Any] | None = None,
+        roles: Mapping[str, Any] | None = None,
+    ) -> None:
+        # Column names are unique across the tables, so they can be merged
+        values: dict[str, Any] = {**(configs or {}), **(channels or {}), **(roles or {})}
+
+        setAttr = super().__setattr__
+        setAttr("guildId", guildId)
+        setAttr("version", version)
+        setAttr("prefixes", tuple(prefixes))
+        setAttr("ccMode", values.get("ccMode") or 0)
+        setAttr("_values", MappingProxyType(values))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("GuildSettings is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("GuildSettings is immutable")
+
+    def __repr__(self) -> str:
+        return "<GuildSettings: guildId={0.guildId} version={0.version}>".format(self)
+
+    def get(self, configType: str, fallback: Any = None) -> Any:
+        value = self._values.get(configType)
+        return fallback if value is None else value
+
+
+class GuildConfigStore:
+    """Write-behind store for guild configs tables (GuildConfigs, GuildChannels, GuildRoles)
+
+    Changes are coalesced and upserted (keyed on guild_id) after `delay`
+    seconds, reads should be served from cache and use `load()` on cache
+    miss so pending changes are not lost. Failed flush is retried with
+    exponential backoff.
+    """
+
+    def __init__(self, *, delay: float = 2.0, maxRetryDelay: float = 300.0) -> None:
+        self.delay: float = delay
+        self.maxRetryDelay: float = maxRetryDelay
+        self.logger: logging.Logger = logging.getLogger("discord")
+        self._pending: dict[tuple[type[Model], int], dict[str, Any]] = {}
+        self._flushTask: asyncio.Task | None = None
+
+    async def load(self, table: type[Model], guildId: int) -> dict[str, Any]:
+        config = await table.filter(guild_id=guildId).order_by("id").first().values() or {}  # type: ignore
+
+        for i in ("id", "guild_id"):
+            config.pop(i, None)
+        config.update(self._pending.get((table, guildId), {}))
+        return config
+
+    def set(self, table: type[Model], guildId: int, configType: str, configValue: Any) -> None:
+        self._pending.setdefault((table, guildId), {})[configType] = configValue
+
+        if self._flushTask is None or self._flushTask.done():
+            self._flushTask = asyncio.create_task(self._delayedFlush(self.delay))
+
+    async def _delayedFlush(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        if await self.flush():
+            return
+
+        # Failed changes are kept in memory, try again later
+        retryDelay = min(delay * 2, self.maxRetryDelay)
+        self.logger.warning(f"Retrying to flush guild configs in {retryDelay:g}s")
+        self._flushTask = asyncio.create_task(self._delayedFlush(retryDelay))
+
+    async def close(self) -> None:
+        """Cancel scheduled flush and flush right away"""
+        if self._flushTask is not None:
+            self._flushTask.cancel()
+        if not await self.flush():
+            self.logger.error(f"Unable to flush guild configs of {len(self._pending)} guilds, changes are lost")
+
+    @staticmethod
+    async def _upsert(table: type[Model], columns: list[str], changes: list[tuple[int, dict[str, Any]]]) -> None:
+        rows = [table(guild_id=guildId, **written) for guildId, written in changes]
+        await table.bulk_create(rows, update_fields=columns, on_conflict=["guild_id"])
+
+    def _written(self, key: tuple[type[Model], int], written: dict[str, Any]) -> None:
+        # Only drop what's written, changes made while writing are kept
+        current = self._pending.get(key, {})
+        for configType, configValue in written.items():
+            if configType in current and current[configType] == configValue:
+                del current[configType]
+        if not current:
+            self._pending.pop(key, None)
+
+    async def flush(self) -> bool:
+        """Write every pending changes to database, returns False if some of them failed
+
+        Guilds with the same changed columns are written with a single upsert
+        """
+        groups: dict[tuple[type[Model], tuple[str, ...]], list[tuple[int, dict[str, Any]]]] = {}
+        for (table, guildId), changes in self._pending.items():
+            if changes:
+                groups.setdefault((table, tuple(sorted(changes))), []).append((guildId, dict(changes)))
+
+        success = True
+        for (table, columns), changes in groups.items():
+            try:
+                await self._upsert(table, list(columns), changes)
+            except Exception:
+                # Write them one by one, so one guild can't hold back the others
+                for guildId, written in changes:
+                    try:
+                        await self._upsert(table, list(columns), [(guildId, written)])
+                    except Exception as err:
+                        success = False
+                        self.logger.error(f"Failed to flush {table.__name__} of guild {guildId}: {err}")
+                    else:
+                        self._written((table, guildId), written)
+            else:
+                for guildId, written in changes:
+                    self._written((table, guildId), written)
+
+        return success
+
+    @staticmethod
+    async def collapseDuplicates(table: type[Model], connection: BaseDBAsyncClient | None = None) -> int:
+        """Merge duplicate rows of the same guild into one, returns how many guilds affected
+
+        Rows used to be inserted everytime a config changed, newer rows only
+        have the changed column set, so the newest non-default value of each
+        column wins.
+        """
+        guildIds = (
+            await table.all(using_db=connection)
+            .annotate(count=Count("id"))
+            .group_by("guild_id")
+            .filter(count__gt=1)
+            .values_list("guild_id", flat=True)
+        )
+
+        defaults = {name: field.default for name, field in table._meta.fields_map.items()}
+        for guildId in guildIds:
+            rows = await table.all(using_db=connection).filter(guild_id=guildId).order_by("id").values()
+            keeper = rows[0].pop("id")
+            merged = rows[0]
+            for row in rows[1:]:
+                row.pop("id")
+                merged.update({k: v for k, v in row.items() if v is not None and v != defaults.get(k)})
+
+            merged.pop("guild_id")
+            await table.all(using_db=connection).filter(id=keeper).update(**merged)
+            await table.all(using_db=connection).filter(guild_id=guildId, id__not=keeper).delete()
+
+        return len(guildIds)
@@ -143,6 +143,19 @@ class Developer(*STANDARD_FEATURES, *OPTIONAL_FEATURES):
         translated2 = await ctx.translate(_("test"), locale=discord.Locale("id"))
         await msg.edit(content=msg.content + "\n" + translated2)
 
+    @Feature.Command(parent="jsk", name="pool")
+    async def jsk_pool(self, ctx: Context):
+        """Show database connection pool stats"""
+        stats = ctx.bot.poolMonitor.stats()
+        if not stats:
+            return await ctx.try_reply("Database backend doesn't use connection pool")
+
+        histogram = stats.pop("waitHistogram")
+        e = ZEmbed.default(ctx, title="Connection Pool")
+        e.description = "\n".join("**{}**: `{}`".format(k, v) for k, v in stats.items())
+        e.add_field(name="Wait Time", value="\n".join("`{}`: {}".format(k, v) for k, v in histogram.items()))
+        return await ctx.try_reply(embed=e)
+
     @Feature.Command(parent="jsk", name="lang")
     async def jsk_lang(self, ctx: Context, language: str = "en-US"):
         ctx.bot.i18n.set(discord.Locale(language))
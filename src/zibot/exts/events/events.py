@@ -25,6 +25,7 @@ from ...core import errors
 from ...core.embed import ZEmbed
 from ...core.guild import GuildWrapper
 from ...core.mixin import CogMixin
+from ...core.settings import GuildSettings
 from ...utils import doCaselog, reactsToMessage, utcnow
 from ...utils.format import formatMissingArgError, formatPerms, formatTraceback
 from ..meta import _errors as ccErrors
@@ -49,7 +50,8 @@ async def doModlog(
 ) -> None:
     """Basically handle formatting modlog events"""
 
-    channel = bot.get_channel(await bot.getGuildConfig(guild.id, "modlogCh", "GuildChannels") or 0)
+    settings = await bot.getGuildSettings(guild.id)
+    channel = bot.get_channel(settings.get("modlogCh", 0))
     botUser: discord.User = cast(discord.User, bot.user)
 
     if not moderator:
@@ -116,6 +118,8 @@ class EventHandler(commands.Cog, CogMixin):
             tse.ReactBlock(),
         ]
         self.engine = tse.Interpreter(blocks)
+        # Compiled greetings, keyed by guild ID and greeting type
+        self.programs = tse.ProgramCache(self.engine)
 
         bot.tree.error(self.appCommandError)
 
@@ -142,17 +146,20 @@ class EventHandler(commands.Cog, CogMixin):
             "server": guild,
         }
 
-    async def handleGreeting(self, member: discord.Member, type: str) -> None:
-        channel = await self.bot.getGuildConfig(member.guild.id, f"{type}Ch", "GuildChannels")
-        channel = self.bot.get_channel(channel or 0)
+    async def handleGreeting(self, member: discord.Member, type: str, settings: GuildSettings | None = None) -> None:
+        if settings is None:
+            settings = await self.bot.getGuildSettings(member.guild.id)
+
+        channel = self.bot.get_channel(settings.get(f"{type}Ch", 0))
         if not channel:
             return
 
-        message = await self.bot.getGuildConfig(member.guild.id, f"{type}Msg")
+        message = settings.get(f"{type}Msg")
         if not message:
             message = ("Welcome" if type == "welcome" else "Goodbye") + ", {member}!"
 
-        result = self.engine.process(message, self.getGreetSeed(member))
+        program = self.programs.get((member.guild.id, type), message)
+        result = self.engine.run(program, self.getGreetSeed(member))
         embed = result.actions.get("embed")
         # TODO: Make action tag block to ping everyone, here, or role if admin wants it
         content = (
@@ -174,8 +181,9 @@ class EventHandler(commands.Cog, CogMixin):
     @commands.Cog.listener("on_member_join")
     async def onMemberJoin(self, member: discord.Member) -> None:
         """Welcome message"""
-        await self.handleGreeting(member, "welcome")
-        autoRole = await self.bot.getGuildConfig(member.guild.id, "autoRole", "GuildRoles")
+        settings = await self.bot.getGuildSettings(member.guild.id)
+        await self.handleGreeting(member, "welcome", settings)
+        autoRole = settings.get("autoRole")
         if autoRole:
             try:
                 await member.add_roles(
@@ -445,7 +453,7 @@ class EventHandler(commands.Cog, CogMixin):
         if before.content == after.content:
             return
 
-        logChId = await self.bot.getGuildConfig(guild.id, "purgatoryCh", "GuildChannels")
+        logChId = (await self.bot.getGuildSettings(guild.id)).get("purgatoryCh")
         if not logChId:
             return
 
@@ -509,7 +517,7 @@ class EventHandler(commands.Cog, CogMixin):
         if message.type != discord.MessageType.default:
             return
 
-        logChId = await self.bot.getGuildConfig(guild.id, "purgatoryCh", "GuildChannels")
+        logChId = (await self.bot.getGuildSettings(guild.id)).get("purgatoryCh")
         if not logChId:
             return
 
@@ -632,7 +640,7 @@ class EventHandler(commands.Cog, CogMixin):
             match request:
                 case {"type": "guild", "userId": userId}:
                     _guild = self.bot.get_guild(request["id"])
-                    guild = GuildWrapper(_guild, self.bot) if _guild else None
+                    guild = GuildWrapper.fromContext(_guild, self.bot)
                     if not guild:
                         return data
                     data = {
@@ -646,7 +654,7 @@ class EventHandler(commands.Cog, CogMixin):
                     }
                 case {"type": "prefix-add", "userId": userId}:
                     _guild = self.bot.get_guild(request["guildId"])
-                    guild = GuildWrapper(_guild, self.bot) if _guild else None
+                    guild = GuildWrapper.fromContext(_guild, self.bot)
                     if not guild:
                         return data
                     user = guild.guild.get_member(int(userId))
@@ -657,7 +665,7 @@ class EventHandler(commands.Cog, CogMixin):
                     data = {"prefixes": await guild.getPrefixes()}
                 case {"type": "prefix-rm", "userId": userId}:
                     _guild = self.bot.get_guild(request["guildId"])
-                    guild = GuildWrapper(_guild, self.bot) if _guild else None
+                    guild = GuildWrapper.fromContext(_guild, self.bot)
                     if not guild:
                         return data
                     user = guild.guild.get_member(int(userId))
@@ -6,6 +6,8 @@ file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 import discord
 from discord.ext import commands
 
@@ -23,6 +25,10 @@ from ._errors import (
 )
 
 
+if TYPE_CHECKING:
+    from ._usage import CustomCommandUsage
+
+
 _blocks = [
     tse.AssignmentBlock(),
     tse.EmbedBlock(),
@@ -35,6 +41,47 @@ _blocks = [
     tse.SilentBlock(),
 ]
 ENGINE = tse.Interpreter(_blocks)
+# Compiled custom commands, keyed by command ID and content hash
+PROGRAMS = tse.ProgramCache(ENGINE)
+
+
+class CustomCommandRecord:
+    """Cached custom command, shared by its name and aliases"""
+
+    __slots__ = ("id", "type", "name", "content", "description", "category", "aliases", "url", "uses", "owner", "enabled")
+
+    def __init__(self, cmd: db.Commands, uses: int) -> None:
+        self.id: int = cmd.id
+        self.type: str = cmd.type
+        self.name: str = cmd.name
+        self.content: str = cmd.content
+        self.description: str | None = cmd.description
+        self.category: str = cmd.category
+        self.aliases: list[str] = []
+        self.url: str | None = cmd.url
+        # Includes uses that's not written to database yet
+        self.uses: int = uses
+        self.owner: int = cmd.ownerId
+        self.enabled: bool = cmd.enabled
+
+
+async def loadCustomCommands(guildId: int, usage: CustomCommandUsage | None = None) -> dict[str, CustomCommandRecord]:
+    """Map guild's custom commands' name and aliases to its record"""
+    lookups = await db.CommandsLookup.filter(guild_id=guildId).prefetch_related("cmd")
+
+    records: dict[int, CustomCommandRecord] = {}
+    for lookup in lookups:
+        cmd: db.Commands = lookup.cmd  # type: ignore
+        if cmd.id not in records:
+            records[cmd.id] = CustomCommandRecord(cmd, cmd.uses + (usage.pending(cmd.id) if usage else 0))
+
+    registry: dict[str, CustomCommandRecord] = {}
+    for lookup in lookups:
+        record = records[lookup.cmd_id]  # type: ignore
+        if lookup.name != record.name:
+            record.aliases.append(lookup.name)
+        registry[lookup.name] = record
+    return registry
 
 
 class CustomCommand(commands.Converter):
@@ -56,6 +103,7 @@ class CustomCommand(commands.Converter):
         "uses",
         "owner",
         "enabled",
+        "record",
     )
 
     def __init__(self, id, name: str, category, **kwargs):
@@ -82,6 +130,26 @@ class CustomCommand(commands.Converter):
         self.owner = kwargs.pop("owner", None)
         enabled = kwargs.pop("enabled", 1)
         self.enabled = True if enabled == 1 else False
+        # Registry's record this command is created from
+        self.record: CustomCommandRecord | None = kwargs.pop("record", None)
+
+    @classmethod
+    def fromRecord(cls, record: CustomCommandRecord, invokedName: str | None = None) -> CustomCommand:
+        return cls(
+            id=record.id,
+            type=record.type,
+            content=record.content,
+            name=record.name,
+            invokedName=invokedName or record.name,
+            description=record.description,
+            category=record.category,
+            aliases=list(record.aliases),
+            uses=record.uses,
+            url=record.url,
+            owner=record.owner,
+            enabled=record.enabled,
+            record=record,
+        )
 
     def __str__(self):
         return self.name
@@ -124,7 +192,7 @@ class CustomCommand(commands.Converter):
         if ctx.guild:
             guild = tse.GuildAdapter(ctx.guild)
             seed.update(guild=guild, server=guild)
-        return ENGINE.process(content, seed)
+        return ENGINE.run(PROGRAMS.get(self.id, content), seed)
 
     async def execute(self, ctx: Context, argument: str = "", *, raw: bool = False):
         if not ctx.guild:
@@ -138,8 +206,10 @@ class CustomCommand(commands.Converter):
         if not self.enabled:
             raise CCommandDisabled
 
-        # Increment uses
-        await db.Commands.filter(id=self.id).update(uses=self.uses + 1)
+        # Increment uses, written to database later
+        ctx.bot.ccUsage.add(self.id)
+        if self.record:
+            self.record.uses += 1
 
         result = self._processTag(ctx, argument)
         embed = result.actions.get("embed")
@@ -174,81 +244,31 @@ class CustomCommand(commands.Converter):
         if not guild:
             raise CCommandNotInGuild
 
-        lookup: db.CommandsLookup | None = await db.CommandsLookup.filter(name=command, guild_id=guild.id).first()
-        if not lookup:
+        registry: dict[str, CustomCommandRecord] = await context.bot.cache.customCommands.fetch(guild.id)  # type: ignore
+        record = registry.get(command)
+        if not record:
             # No command found
             raise CCommandNotFound(command)
 
-        _id = lookup.cmd_id  # type: ignore
-        name = lookup.name
-
-        results: db.CommandsLookup | None = await db.CommandsLookup.filter(cmd_id=_id).prefetch_related("cmd")  # type: ignore
-        if not results:
-            raise CCommandNotFound(command)
-
-        cmd: db.Commands = results[0].cmd  # type: ignore
-
-        return cls(
-            id=_id,
-            content=cmd.content,
-            name=cmd.name,
-            invokedName=name,
-            description=cmd.description,
-            category=cmd.category,
-            aliases=[alias.name for alias in results if alias.name != cmd.name],
-            uses=cmd.uses,
-            url=cmd.url,
-            owner=cmd.ownerId,
-            enabled=cmd.enabled,
-        )
+        return cls.fromRecord(record, command)
 
     @staticmethod
     async def getAll(context: Context | discord.Object, category: str = None) -> list[CustomCommand]:
         if isinstance(context, Context):
             guild: discord.Object | (GuildWrapper | None) = context.guild
+            if not guild:
+                raise CCommandNotInGuild
+            registry = await context.bot.cache.customCommands.fetch(guild.id)  # type: ignore
         else:
-            guild = context
-
-        if not guild:
-            raise CCommandNotInGuild
-
-        cmds = {}
+            registry = await loadCustomCommands(context.id)
 
-        query = db.CommandsLookup.filter(guild_id=guild.id)
+        # Name and aliases share the same record
+        records = {record.id: record for record in registry.values()}.values()
         if category:
-            query = query.filter(cmd__category=category.lower())
-
-        lookupRes = await query.prefetch_related("cmd")
-
-        if not lookupRes:
-            return []
-
-        # Create temporary dict
-        for lookup in lookupRes:
-            cmd: db.Commands = lookup.cmd  # type: ignore
-
-            isAlias = lookup.name != cmd.name
-
-            if cmd.id not in cmds:
-                cmds[cmd.id] = {}
-
-            if not isAlias:
-                # If its not an alias
-                cmds[cmd.id] = {
-                    "name": cmd.name,  # "real" name
-                    "description": cmd.description,
-                    "category": cmd.category,
-                    "owner": cmd.ownerId,
-                    "enabled": cmd.enabled,
-                    "uses": cmd.uses,
-                }
-            else:
-                try:
-                    cmds[cmd.id]["aliases"] += [lookup.name]
-                except KeyError:
-                    cmds[cmd.id]["aliases"] = [lookup.name]
-
-        return [CustomCommand(id=k, **v) for k, v in cmds.items()]
+            category = category.lower()
+            records = [record for record in records if record.category == category]
+
+        return [CustomCommand.fromRecord(record) for record in records]
 
     @classmethod
     async def convert(cls, ctx: Context, name: str) -> CustomCommand:
@@ -0,0 +1,104 @@
+"""
+This Source Code Form is subject to the terms of the Mozilla Public
+License, v. 2.0. If a copy of the MPL was not distributed with this
+file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter, defaultdict
+
+from tortoise.expressions import F
+
+from ...core import db
+
+
+__all__ = ("CustomCommandUsage",)
+
+
+class CustomCommandUsage:
+    """Accumulate custom commands' usage and write them in batches
+
+    Written as `uses = uses + n` every `interval` seconds (and on shutdown),
+    so concurrent uses won't overwrite each other. Failed flush is retried
+    with exponential backoff.
+    """
+
+    __slots__ = ("interval", "maxRetryDelay", "logger", "_pending", "_flushTask", "_flushing")
+
+    def __init__(self, *, interval: float = 30.0, maxRetryDelay: float = 300.0) -> None:
+        self.interval: float = interval
+        self.maxRetryDelay: float = maxRetryDelay
+        self.logger: logging.Logger = logging.getLogger("discord")
+        self._pending: Counter[int] = Counter()
+        self._flushTask: asyncio.Task | None = None
+        # Whether the scheduled flush is writing to database
+        self._flushing: bool = False
+
+    def add(self, commandId: int, amount: int = 1) -> None:
+        self._pending[commandId] += amount
+
+        if self._flushTask is None or self._flushTask.done():
+            self._flushTask = asyncio.create_task(self._delayedFlush(self.interval))
+
+    def pending(self, commandId: int) -> int:
+        """Uses that's not written to database yet"""
+        return self._pending.get(commandId, 0)
+
+    async def _delayedFlush(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._flushing = True
+        try:
+            if await self.flush():
+                return
+        finally:
+            self._flushing = False
+
+        # Failed uses are kept in memory, try again later
+        retryDelay = min(delay * 2, self.maxRetryDelay)
+        self.logger.warning(f"Retrying to flush custom command usage in {retryDelay:g}s")
+        self._flushTask = asyncio.create_task(self._delayedFlush(retryDelay))
+
+    async def close(self) -> None:
+        """Cancel scheduled flush and flush right away"""
+        task = self._flushTask
+        if task is not None:
+            # Cancelling it mid-write may write the same uses twice, wait
+            # for it instead
+            if not self._flushing:
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if self._flushTask is not None:
+            # Retry scheduled by the flush we waited for
+            self._flushTask.cancel()
+
+        if not await self.flush():
+            self.logger.error(f"Unable to flush usage of {len(self._pending)} custom commands, uses are lost")
+
+    async def flush(self) -> bool:
+        """Write every pending uses to database, returns False if some of them failed"""
+        pending, self._pending = self._pending, Counter()
+
+        # Commands with the same amount can share a query
+        byAmount: defaultdict[int, list[int]] = defaultdict(list)
+        for commandId, amount in pending.items():
+            byAmount[amount].append(commandId)
+
+        success = True
+        try:
+            for amount, commandIds in byAmount.items():
+                try:
+                    await db.Commands.filter(id__in=commandIds).update(uses=F("uses") + amount)
+                except Exception as err:
+                    success = False
+                    self.logger.error(f"Failed to flush usage of {len(commandIds)} custom commands: {err}")
+                    continue
+                for commandId in commandIds:
+                    del pending[commandId]
+        finally:
+            # Put back what's not written, will be retried later
+            self._pending.update(pending)
+
+        return success
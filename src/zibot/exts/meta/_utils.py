@@ -7,13 +7,19 @@ file, You can obtain one at http://mozilla.org/MPL/2.0/.
 from ...core import db
 
 
-async def getDisabledCommands(bot, guildId):
-    if bot.cache.disabled.get(guildId) is None:
-        dbDisabled = await db.Disabled.filter(guild_id=guildId)
+async def loadDisabledCommands(guildId: int) -> list[str]:
+    return [c.command for c in await db.Disabled.filter(guild_id=guildId)]
 
-        try:
-            bot.cache.disabled.extend(guildId, [c.command for c in dbDisabled])
-        except ValueError:
-            return []
 
-    return bot.cache.disabled.get(guildId, [])
+async def getDisabledCommands(bot, guildId) -> frozenset[str]:
+    # Will be loaded from database if it's not cached
+    return await bot.cache.disabled.fetch(guildId)
+
+
+async def loadCustomCommandNames(guildId: int) -> list[str]:
+    return await db.CommandsLookup.filter(guild_id=guildId).values_list("name", flat=True)  # type: ignore
+
+
+async def getCustomCommandNames(bot, guildId) -> frozenset[str]:
+    """Names and aliases of guild's custom commands, for ruling out misses"""
+    return await bot.cache.customCommandNames.fetch(guildId)
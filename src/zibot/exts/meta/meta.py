@@ -176,7 +176,7 @@ class Meta(MetaCustomCommands):
         if not ctx.guild:
             raise DefaultError("Custom prefix for user is not yet implemented! Ping me to check my default prefixes")
         prefixes = await ctx.guild.getPrefixes()
-        menu = ZMenuPagesView(ctx, source=PrefixesPageSource(ctx, ["placeholder"] * 2 + prefixes))
+        menu = ZMenuPagesView(ctx, source=PrefixesPageSource(ctx, ["placeholder"] * 2 + list(prefixes)))
         await menu.start()
 
     @prefix.command(
@@ -7,6 +7,7 @@ file, You can obtain one at http://mozilla.org/MPL/2.0/.
 from __future__ import annotations
 
 import difflib
+import functools
 import re
 from typing import TYPE_CHECKING, Any, Iterable
 
@@ -15,7 +16,7 @@ from discord.ext import commands
 
 from ....core import checks, db
 from ....core.context import Context
-from ....core.data import CacheListProperty, CacheUniqueViolation
+from ....core.data import CacheProperty, CacheSetProperty, CacheUniqueViolation
 from ....core.embed import ZEmbed
 from ....core.guild import CCMode, GuildWrapper
 from ....core.menus import ZChoices, choice
@@ -23,10 +24,10 @@ from ....core.mixin import CogMixin
 from ....utils import utcnow
 from ....utils.format import formatCmdName
 from .._checks import hasCCPriviledge
-from .._custom_command import CustomCommand, ManagedCustomCommand
+from .._custom_command import CustomCommand, ManagedCustomCommand, loadCustomCommands
 from .._errors import CCommandAlreadyExists, CCommandNoPerm, CCommandNotFound
 from .._flags import CmdManagerFlags
-from .._utils import getDisabledCommands
+from .._utils import getDisabledCommands, loadCustomCommandNames, loadDisabledCommands
 
 
 if TYPE_CHECKING:
@@ -47,13 +48,43 @@ class MetaCustomCommands(commands.Cog, CogMixin):
     def __init__(self, bot: ziBot):
         super().__init__(bot)
 
-        # Cache for disabled commands
+        # Cache for disabled commands, indexed by qualified name
         self.bot.cache.add(
             "disabled",
-            cls=CacheListProperty,
-            unique=True,
+            cls=CacheSetProperty,
+            maxEntries=self.bot.config.guildCacheSize,
+            loader=loadDisabledCommands,
+        )
+        # Cache for custom commands, indexed by name and aliases
+        self.bot.cache.add(
+            "customCommands",
+            cls=CacheProperty,
+            maxEntries=self.bot.config.guildCacheSize,
+            loader=functools.partial(loadCustomCommands, usage=self.bot.ccUsage),
+        )
+
+        # Names and aliases only, checked before trying to run a custom command
+        self.bot.cache.add(
+            "customCommandNames",
+            cls=CacheSetProperty,
+            maxEntries=self.bot.config.guildCacheSize,
+            loader=loadCustomCommandNames,
         )
 
+    def invalidateCommands(self, guildId: int) -> None:
+        """Should be called everytime guild's custom commands are modified"""
+        self.bot.cache.customCommands.clear(guildId)  # type: ignore
+
+    def updateCommandNames(self, guildId: int, *, added: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+        """Keep cached names in sync with commandsLookup"""
+        names = self.bot.cache.customCommandNames  # type: ignore
+        if guildId not in names:
+            # Will be loaded from database when needed, also make sure load
+            # that started before the change won't be cached
+            names.clear(guildId)
+            return
+        names.set(guildId, (names.get(guildId) | frozenset(added)) - frozenset(removed))
+
     # TODO: Separate tags from custom command
     @commands.group(
         aliases=("cmd", "tag", "script"),
@@ -90,6 +121,8 @@ class MetaCustomCommands(commands.Cog, CogMixin):
             url=kwargs.get("url"),
         )
         lookup = await db.CommandsLookup.create(cmd_id=cmd.id, name=name, guild_id=ctx.guild.id)
+        self.invalidateCommands(ctx.guild.id)
+        self.updateCommandNames(ctx.guild.id, added=(name,))
         if cmd and lookup:
             return cmd.id, lookup.name
         return (None,) * 2
@@ -120,8 +153,8 @@ class MetaCustomCommands(commands.Cog, CogMixin):
 
     async def isCmdExist(self, ctx, name: str):
         """Check if command already exists"""
-        rows = await db.CommandsLookup.filter(name=name, guild__id=ctx.guild.id).first()
-        if rows:
+        registry = await self.bot.cache.customCommands.fetch(ctx.guild.id)  # type: ignore
+        if name in registry:
             raise CCommandAlreadyExists(name)
 
     @command.command(
@@ -224,15 +257,17 @@ class MetaCustomCommands(commands.Cog, CogMixin):
             return await ctx.try_reply("Nothing changed.")
 
         await db.Commands.filter(id=command.id).update(url=link)
+        self.invalidateCommands(ctx.guild.id)  # type: ignore
 
         return await ctx.success(
             "\nYou can do `{}command update {}` to update the content".format(ctx.clean_prefix, name),
             title="`{}` url has been set to <{}>".format(name, url),
         )
 
-    async def updateCommandContent(self, _: Context, command: ManagedCustomCommand, content):
+    async def updateCommandContent(self, ctx: Context, command: ManagedCustomCommand, content):
         """Update command's content"""
         update = await db.Commands.filter(id=command.id).update(content=content)
+        self.invalidateCommands(ctx.guild.id)  # type: ignore
         if update:
             return True
         return False
@@ -305,6 +340,8 @@ class MetaCustomCommands(commands.Cog, CogMixin):
             return await ctx.error("Alias `{}` already exists!".format(alias))
 
         insert = await db.CommandsLookup.create(cmd_id=command.id, name=alias, guild_id=ctx.guild.id)
+        self.invalidateCommands(ctx.guild.id)
+        self.updateCommandNames(ctx.guild.id, added=(alias,))
 
         if insert:
             return await ctx.success(title="Alias `{}` for `{}` has been created".format(alias, command))
@@ -390,6 +427,7 @@ class MetaCustomCommands(commands.Cog, CogMixin):
             return await ctx.success(title="{} already in {}!".format(command, category))
 
         update = await db.Commands.filter(id=command.id).update(category=category)
+        self.invalidateCommands(ctx.guild.id)
 
         if update:
             return await ctx.success(title="{}'s category has been set to {}!".format(command, category))
@@ -440,9 +478,13 @@ class MetaCustomCommands(commands.Cog, CogMixin):
         isAlias = command.invokedName in command.aliases
         if isAlias:
             await db.CommandsLookup.filter(name=command.invokedName, guild_id=ctx.guild.id).delete()
+            removed = [command.invokedName]
         else:
             # NOTE: Aliases will be deleted automatically
             await db.Commands.filter(id=command.id).delete()
+            removed = [command.name, *command.aliases]
+        self.invalidateCommands(ctx.guild.id)
+        self.updateCommandNames(ctx.guild.id, removed=removed)
 
         return await ctx.success(title="{} `{}` has been removed".format("Alias" if isAlias else "Command", command.name))
 
@@ -576,6 +618,7 @@ class MetaCustomCommands(commands.Cog, CogMixin):
                 return await ctx.error(title=alreadyMsg.format(name))
 
             await db.Commands.filter(id=command.id).update(enabled=False)
+            self.invalidateCommands(ctx.guild.id)
             return await ctx.success(title=successMsg.format(name))
 
         if mode == "command":
@@ -660,11 +703,15 @@ class MetaCustomCommands(commands.Cog, CogMixin):
                 return await ctx.error(title=alreadyMsg.format(name))
 
             await db.Commands.filter(id=command.id).update(enabled=True)
+            self.invalidateCommands(ctx.guild.id)
             return await ctx.success(title=successMsg.format(name))
 
         if mode == "command":
             cmdName = chosen[0]
 
+            # Make sure disable command is cached from database
+            await getDisabledCommands(self.bot, ctx.guild.id)
+
             try:
                 self.bot.cache.disabled.remove(ctx.guild.id, cmdName)  # type: ignore
             except (ValueError, IndexError):
@@ -427,15 +427,7 @@ class Moderation(commands.Cog, CogMixin):
     async def getMutedMembers(self, guildId: int):
         # Getting muted members from db/cache
         # Will cache db results automatically
-        if (mutedMembers := self.bot.cache.guildMutes.get(guildId)) is None:  # type: ignore
-            dbMutes = await db.GuildMutes.filter(guild_id=guildId)
-
-            try:
-                mutedMembers = [m.mutedId for m in dbMutes]
-                self.bot.cache.guildMutes.extend(guildId, mutedMembers)  # type: ignore
-            except ValueError:
-                mutedMembers = []
-        return mutedMembers
+        return await self.bot.cache.guildMutes.fetch(guildId)  # type: ignore
 
     async def manageMuted(
         self,
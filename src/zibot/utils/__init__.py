@@ -26,6 +26,7 @@ from pyparsing import (
     alphas,
     delimitedList,
 )
+from tortoise.expressions import F
 from tortoise.functions import Max
 
 from ..core import db
@@ -290,6 +291,25 @@ def decodeMorse(msg):
     return decoded
 
 
+async def loadCaseCount(guildId: int) -> int:
+    """Get guild's last case number, only done once per guild"""
+    caseCount: int = await db.Guilds.filter(id=guildId).first().values_list("caseCount", flat=True) or 0  # type: ignore
+
+    # Cases created before caseCount exists
+    # I had to use .values() instead of .first() because of a known Tortoise issue
+    # REF: https://github.com/tortoise/tortoise-orm/issues/794
+    q: list[dict[str, Any]] = await db.CaseLog.filter(guild_id=guildId).annotate(caseId=Max("caseId")).values("caseId")  # type: ignore
+    try:
+        lastCase = q[0]["caseId"] or 0
+    except (IndexError, KeyError):
+        lastCase = 0
+
+    if lastCase > caseCount:
+        await db.Guilds.filter(id=guildId).update(caseCount=lastCase)
+        caseCount = lastCase
+    return caseCount
+
+
 async def doCaselog(
     bot,
     *,
@@ -298,28 +318,26 @@ async def doCaselog(
     modId: int,
     targetId: int,
     reason: str,
-) -> Optional[int]:
-    # I had to use .values() instead of .first() because of a known Tortoise issue
-    # REF: https://github.com/tortoise/tortoise-orm/issues/794
-    q: list[dict[str, Any]] = await db.CaseLog.filter(guild_id=guildId).annotate(caseId=Max("caseId")).values("caseId")  # type: ignore
-
-    try:
-        caseNum = q[0]["caseId"]
-    except (IndexError, KeyError):
-        caseNum = 0
-    caseNum += 1
-
-    if caseNum:
-        await db.CaseLog.create(
-            caseId=caseNum,
-            guild_id=guildId,
-            type=type,
-            modId=modId,
-            targetId=targetId,
-            reason=reason,
-            createdAt=utcnow(),
-        )
-        return int(caseNum)
+) -> int:
+    cached = bot.cache.caseCounts
+    await cached.fetch(guildId)
+    # Read again after fetch, concurrent actions share the same load. No
+    # await between reading and writing, so every action get different
+    # case number
+    caseNum = cached[guildId] + 1
+    cached.set(guildId, caseNum)
+    await db.Guilds.filter(id=guildId).update(caseCount=F("caseCount") + 1)
+
+    await db.CaseLog.create(
+        caseId=caseNum,
+        guild_id=guildId,
+        type=type,
+        modId=modId,
+        targetId=targetId,
+        reason=reason,
+        createdAt=utcnow(),
+    )
+    return caseNum
 
 
 TAG_IN_MD = {